@@ -0,0 +1,80 @@
+import itertools
+
+ARENA_TYPES = ("fleetarena", "squadarena")
+
+class AllyCodeIndex:
+    """Reverse lookups over ally_code_tracking.
+
+    owner(ally_code) gives the Discord user registered with an ally code and
+    trackers(arena_type, ally_code) the users tracking it as an opponent. Call
+    update_user() whenever a user's entry changes; it re-derives just that user's
+    contribution, so lookups never scan the whole registry.
+
+    When several users match, they come back in registration order (the order of
+    ally_code_tracking), the same order the old scans over the registry used.
+    """
+    def __init__(self, ally_code_tracking):
+        self.ally_code_tracking = ally_code_tracking
+        # Each ally code maps to a dict used as an insertion-ordered set of user ids
+        self._owners = {}
+        self._trackers = {arena_type: {} for arena_type in ARENA_TYPES}
+        # What each user currently contributes, so it can be taken back out
+        self._owned_by_user = {}
+        self._tracked_by_user = {}
+        # Registration order; a user keeps their place until they leave ally_code_tracking
+        self._order = {}
+        self._counter = itertools.count()
+        for user_id in ally_code_tracking:
+            self.update_user(user_id)
+
+    @staticmethod
+    def _discard(index, ally_code, user_id):
+        users = index.get(ally_code)
+        if users is not None:
+            users.pop(user_id, None)
+            if not users:
+                del index[ally_code]
+
+    def _remove_user(self, user_id):
+        ally_code = self._owned_by_user.pop(user_id, None)
+        if ally_code is not None:
+            self._discard(self._owners, ally_code, user_id)
+
+        for arena_type, ally_codes in self._tracked_by_user.pop(user_id, {}).items():
+            for opponent_code in ally_codes:
+                self._discard(self._trackers[arena_type], opponent_code, user_id)
+
+    def update_user(self, user_id):
+        self._remove_user(user_id)
+        user_info = self.ally_code_tracking.get(user_id)
+        if user_id not in self.ally_code_tracking:
+            self._order.pop(user_id, None)
+        else:
+            self._order.setdefault(user_id, next(self._counter))
+        if not user_info:
+            return
+
+        ally_code = user_info.get("ally_code")
+        if ally_code:
+            self._owned_by_user[user_id] = ally_code
+            self._owners.setdefault(ally_code, {})[user_id] = None
+
+        tracked = {}
+        for arena_type in ARENA_TYPES:
+            opponents = user_info.get(arena_type, {}).get("opponent_rank_tracking", [])
+            ally_codes = {opponent.get("ally_code"): None for opponent in opponents if opponent.get("ally_code")}
+            for opponent_code in ally_codes:
+                self._trackers[arena_type].setdefault(opponent_code, {})[user_id] = None
+            tracked[arena_type] = ally_codes
+        self._tracked_by_user[user_id] = tracked
+
+    def _in_registration_order(self, users):
+        return sorted(users, key=self._order.__getitem__)
+
+    def owner(self, ally_code):
+        owners = self._owners.get(ally_code)
+        # First registration wins, matching the old scan over the registry
+        return self._in_registration_order(owners)[0] if owners else None
+
+    def trackers(self, arena_type, ally_code):
+        return self._in_registration_order(self._trackers[arena_type].get(ally_code, {}))
@@ -0,0 +1,66 @@
+import os
+import time
+
+ARENA_ACTIVE_POLL_SECONDS = int(os.getenv("ARENA_ACTIVE_POLL_SECONDS", "60")) # near payout or right after a rank change
+ARENA_IDLE_POLL_SECONDS = int(os.getenv("ARENA_IDLE_POLL_SECONDS", "720")) # quiet players, far from payout
+ARENA_PAYOUT_WINDOW_SECONDS = int(os.getenv("ARENA_PAYOUT_WINDOW_SECONDS", str(2 * 3600))) # poll every minute this long before payout
+ARENA_RECENT_CHANGE_SECONDS = 30 * 60 # a rank change keeps a player on the active interval this long
+POLL_SLACK_SECONDS = 5 # loop ticks drift a little; don't push a due player to the next tick over it
+
+class ArenaPollSchedule:
+    """When each tracked ally code should next be polled for arena ranks.
+
+    Players close to a payout, or whose rank just moved, are polled every tick.
+    Otherwise the interval stretches with time since the last change, up to the
+    idle interval, but a poll always lands on the payout minute itself so payout
+    messages still go out.
+    """
+    def __init__(self):
+        self._next_poll = {}
+        self._last_change = {}
+        self._last_ranks = {}
+
+    def due(self, ally_codes, now=None):
+        now = time.time() if now is None else now
+        return {ally_code for ally_code in ally_codes if self._next_poll.get(ally_code, 0) <= now + POLL_SLACK_SECONDS}
+
+    def _interval(self, ally_code, payout_epochs, now):
+        seconds_to_payout = min((epoch - now for epoch in payout_epochs if epoch > now), default=None)
+        if seconds_to_payout is not None and seconds_to_payout <= ARENA_PAYOUT_WINDOW_SECONDS:
+            return ARENA_ACTIVE_POLL_SECONDS
+
+        idle_for = now - self._last_change.get(ally_code, 0)
+        if idle_for <= ARENA_RECENT_CHANGE_SECONDS:
+            return ARENA_ACTIVE_POLL_SECONDS
+        # Back off gradually: as long again as the player has been idle, capped at the idle interval
+        interval = max(ARENA_ACTIVE_POLL_SECONDS, min(idle_for - ARENA_RECENT_CHANGE_SECONDS, ARENA_IDLE_POLL_SECONDS))
+        if seconds_to_payout is not None:
+            # Never sleep through the payout minute
+            interval = min(interval, seconds_to_payout)
+        return interval
+
+    def record(self, ally_code, ranks, payout_epochs, now=None):
+        """Note a poll result ({tab: rank} or None on failure) and schedule the next poll."""
+        now = time.time() if now is None else now
+        if ranks is None:
+            # Failed fetch: try again next tick
+            self._next_poll[ally_code] = now + ARENA_ACTIVE_POLL_SECONDS
+            return
+
+        previous = self._last_ranks.get(ally_code)
+        if previous is None:
+            # First sighting isn't a change; start backing off from the shortest interval
+            self._last_change.setdefault(ally_code, now - ARENA_RECENT_CHANGE_SECONDS)
+        elif previous != ranks:
+            self._last_change[ally_code] = now
+        self._last_ranks[ally_code] = ranks
+        self._next_poll[ally_code] = now + self._interval(ally_code, payout_epochs, now)
+
+    def retain(self, ally_codes):
+        # Forget players nobody tracks anymore
+        for schedule in (self._next_poll, self._last_change, self._last_ranks):
+            for ally_code in [ally_code for ally_code in schedule if ally_code not in ally_codes]:
+                del schedule[ally_code]
+
+    def __len__(self):
+        return len(self._next_poll)
@@ -1,20 +1,33 @@
 import os
+import asyncio
+import io
+import time
 from lookupPlayer import get_guild_info, get_player_id_from_guild, get_player_ally_code_by_id
 from dotenv import load_dotenv
 import discord
-from discord import option, DiscordServerError
+from discord import option
 from discord.ext import tasks
 from datetime import datetime, timedelta, UTC
-import json
 import pytz
 from zoneinfo import ZoneInfo
-import requests
 import re
-from update_mod_data import check_and_update_mod_data, get_valid_mod_characters, get_character_mod_info, find_characters_with_mod
+from update_mod_data import check_and_update_mod_data, get_valid_mod_characters, get_character_mod_info, find_characters_with_mod, load_mod_data
 from character_caching import update_all_characters_cache, get_valid_all_characters, load_character, load_character_base_id
-from png_generator import create_image_with_mods
+from mod_card_cache import mod_card_cache
+from png_generator import render_assets
+from portrait_cache import portrait_cache
+from worker_pool import render_pool, WorkerPoolFull
+from persistence import SqliteStateStore
+from ally_code_index import AllyCodeIndex
+from reset_scheduler import ResetScheduler
+from reset_schedule import ResetSchedule, next_reset_epochs
+from dm_cache import DirectMessageCache
+from send_queue import send_queue
+from work_scheduler import work_scheduler, current_priority, INTERACTIVE
+from arena_poll_schedule import ArenaPollSchedule
 from extract_inventory import parse_inventory_file
-from functools import wraps
+from comlink_client import comlink
+from functools import lru_cache, wraps
 
 # region Setup
 # Load environment variables from .env file
@@ -25,10 +38,39 @@ BOT_TOKEN = os.getenv('BOT_TOKEN')
 RESET_MINUTE = "30" # ex. 10:{30} <-
 FORMAT24 = "Military"
 PREVIOUS_RANKS = None
+PVP_FETCH_CONCURRENCY = int(os.getenv('PVP_FETCH_CONCURRENCY', '10')) # max playerArena requests in flight per tick
+INVENTORY_WORKERS = int(os.getenv('INVENTORY_WORKERS', '2')) # inventory uploads parsed at the same time
+INVENTORY_QUEUE_DEPTH = int(os.getenv('INVENTORY_QUEUE_DEPTH', '20')) # inventory uploads allowed to wait
+STATE_FLUSH_SECONDS = int(os.getenv('STATE_FLUSH_SECONDS', '5')) # how often changed state rows are written to the database
+STATE_DB_PATH = os.getenv('STATE_DB_PATH', 'r2d2_state.db')
 
 # You cannot monitor "onMessage" without ALL intents and setting ALL intents on your discord bot in the dev settings
 intents = discord.Intents.all()
-bot = discord.Bot(intents=intents)
+
+class R2D2Bot(discord.Bot):
+    async def invoke_application_command(self, ctx):
+        # Everything a slash command awaits runs ahead of the background loops
+        token = current_priority.set(INTERACTIVE)
+        try:
+            await super().invoke_application_command(ctx)
+        finally:
+            current_priority.reset(token)
+
+    async def close(self):
+        # Stop the background flush and let a write already in progress finish,
+        # then write out anything changed since
+        flush_state.cancel()
+        await state.wait_for_writes()
+        state.flush_now()
+
+        await super().close()
+        # Release the pooled Comlink connections and worker threads on shutdown
+        await comlink.close()
+        render_pool.shutdown()
+        state.close()
+
+bot = R2D2Bot(intents=intents)
+dm_cache = DirectMessageCache(bot)
 
 
 def print_and_ignore_exceptions(func):
@@ -42,34 +84,42 @@ def print_and_ignore_exceptions(func):
             print(f"Unexpected error in {func.__name__}: {str(e)}")
     return wrapper
 
-# Load guild reset times from JSON file on bot startup
-try:
-    with open("guild_reset_times.json", "r") as file:
-        guild_reset_times = json.load(file)
-except FileNotFoundError:
-    guild_reset_times = {}
-
-try:
-    with open("personal_reset_times.json", "r") as file:
-        personal_reset_times = json.load(file)
-except FileNotFoundError:
-    guild_reset_times = {}
-
-try:
-    with open("ally_code_tracking.json", "r") as file:
-        ally_code_tracking = json.load(file)
-except FileNotFoundError:
-    guild_reset_times = {}
-
-try:
-    with open("channels.json", "r") as file:
-        channels = json.load(file)
-except FileNotFoundError:
-    channels = {}
+# Load the bot state from SQLite on startup, importing the old JSON files the first time.
+# Changed rows are marked dirty and written in the background by flush_state.
+state = SqliteStateStore(STATE_DB_PATH)
+state.migrate_from_json("guild_reset_times.json", "personal_reset_times.json", "ally_code_tracking.json", "channels.json")
+guild_reset_times = state.guild_reset_times
+personal_reset_times = state.personal_reset_times
+ally_code_tracking = state.ally_code_tracking
+channels = state.channels
+ally_code_index = AllyCodeIndex(ally_code_tracking)
+
+def compact_squad_lineup(squad_lineup):
+    # Older saves embedded the full catalog entry (or a fallback dict) for every unit
+    return tuple(
+        unit if isinstance(unit, str) else unit.get("base_id") or unit.get("unitDefId", "").split(':')[0]
+        for unit in squad_lineup
+    )
+
+def migrate_squad_lineups():
+    for user_id, user_info in ally_code_tracking.items():
+        arenas = [user_info.get(arena_type) for arena_type in ("fleetarena", "squadarena")]
+        tracked = [arena for arena in arenas if isinstance(arena, dict)]
+        tracked += [opponent for arena in tracked for opponent in arena.get("opponent_rank_tracking", [])]
+        changed = False
+        for entry in tracked:
+            squad_lineup = entry.get("squad_lineup")
+            if squad_lineup and any(not isinstance(unit, str) for unit in squad_lineup):
+                entry["squad_lineup"] = compact_squad_lineup(squad_lineup)
+                changed = True
+        if changed:
+            save_ally_code_tracking(user_id)
+
 
 @bot.event
 async def on_ready():
     print(f"{bot.user} is ready and online!")
+    start_inventory_workers()
 
 # Define the activity messages
 activity_messages = {
@@ -171,23 +221,20 @@ def get_activity_message(day, personalreset, next_reset_time_str = None, next_pe
 
     return activity_message
 
-# Function to save guild reset times into JSON file
-def save_guild_reset_times():
-    with open("guild_reset_times.json", "w") as file:
-        json.dump(guild_reset_times, file)
+# Function to save a guild's reset settings (written by the next flush_state)
+def save_guild_reset_times(guild_id):
+    state.mark_dirty("guilds", guild_id)
 
-# Function to save guild reset times into JSON file
-def save_personal_reset_times():
-    with open("personal_reset_times.json", "w") as file:
-        json.dump(personal_reset_times, file)
+# Function to save a user's personal reset settings
+def save_personal_reset_times(user_id):
+    state.mark_dirty("personal_subscriptions", user_id)
 
-def save_ally_code_tracking():
-    with open("ally_code_tracking.json", "w") as file:
-        json.dump(ally_code_tracking, file)
+def save_ally_code_tracking(user_id):
+    ally_code_index.update_user(user_id)
+    state.mark_dirty("users", user_id)
 
-def save_channels():
-    with open("channels.json", "w") as file:
-        json.dump(channels, file)
+def save_channels(channel_id):
+    state.mark_dirty("channels", channel_id)
 
         
 # Fetch the list of valid timezones
@@ -196,13 +243,13 @@ valid_timezones = list(pytz.all_timezones)
 # Command to set current tickets (use in bot command)
 async def set_current_tickets(guild_id, tickets):
     guild_reset_times[guild_id]["current_tickets"] = tickets
-    save_guild_reset_times()
+    save_guild_reset_times(guild_id)
 
 # Increment tickets in the daily message handler
 def increment_tickets(guild_id, tickets_today):
     current_tickets = guild_reset_times.get(guild_id, {}).get("current_tickets", 0)
     guild_reset_times[guild_id]["current_tickets"] = current_tickets + tickets_today
-    save_guild_reset_times()
+    save_guild_reset_times(guild_id)
 
 # Function to provide hour options based on the selected time format
 @print_and_ignore_exceptions
@@ -224,55 +271,29 @@ async def get_valid_timezones(ctx: discord.AutocompleteContext):
         return filtered_timezones
 
 # Function to calculate the next epoch time for the specified reset hour
-def calculate_next_reset_epoch(resethour, timeformat, timezone, dst, today, personal = False):
+# Parsed once per distinct registration; the arguments are exactly what a guild or subscriber stores
+@lru_cache(maxsize=None)
+def get_reset_schedule(resethour, timeformat, timezone, dst, personal = False):
     resetmin = "00" if personal else RESET_MINUTE
     reset_time_str = f"{resethour}:" + resetmin + ("" if timeformat == FORMAT24 else " " + timeformat)
     reset_time_format = "%H:%M" if timeformat == FORMAT24 else "%I:%M %p"
     reset_time = datetime.strptime(reset_time_str, reset_time_format)
-    
-    # Adds Timezone information to the object
-    reset_time = reset_time.replace(tzinfo=ZoneInfo(timezone))
-
-    # If the guild's reset time was set during DST, check if DST is currently in effect
-    current_time = datetime.now(ZoneInfo(timezone))
-    is_currently_dst = current_time.dst() != timedelta(0)
-    if dst and not is_currently_dst:
-        reset_time -= timedelta(hours=1)
-    elif not dst and is_currently_dst:
-        reset_time += timedelta(hours=1)
-    
-    now = datetime.now(ZoneInfo(timezone))
-    next_reset_time = reset_time.replace(year=now.year, month=now.month, day=now.day)
-    if today != True and next_reset_time <= now:
-        next_reset_time += timedelta(days=1)
-    return next_reset_time
-
-def fetch_pvp_ranks(ally_code: str):
-    url = f'{os.getenv("COMLINK_API")}/playerArena'
-    payload = {
-        "payload": {
-            "allyCode": ally_code
-        }
-    }
+    return ResetSchedule(reset_time.hour, reset_time.minute, ZoneInfo(timezone), dst)
 
-    response = requests.post(url, json=payload)
-    if response.status_code == 200:
-        utc_offset = response.json().get('localTimeZoneOffsetMinutes', 0)
-        pvp_profile = response.json().get('pvpProfile', [])
-        name = response.json().get('name', "")
+def calculate_next_reset_epoch(resethour, timeformat, timezone, dst, today, personal = False):
+    return get_reset_schedule(resethour, timeformat, timezone, dst, personal).next_reset(today=today)
+
+async def fetch_pvp_ranks(ally_code: str):
+    response = await comlink.player_arena(ally_code)
+    if response is not None:
+        utc_offset = response.get('localTimeZoneOffsetMinutes', 0)
+        pvp_profile = response.get('pvpProfile', [])
+        name = response.get('name', "")
         ranks = {}
 
         for entry in pvp_profile:
-            squad_lineup = []
-            for unit in entry['squad']['cell']:
-                unit_def_id = unit['unitDefId']
-                base_name = unit_def_id.split(':')[0]  # Extract the part before the colon
-                character_info = load_character_base_id(base_name)  # Fetch character data
-                # If character_info is missing, append a minimal fallback dict so downstream code doesn't fail
-                if character_info is None:
-                    squad_lineup.append({"unitDefId": unit_def_id, "name": base_name})
-                else:
-                    squad_lineup.append(character_info)  # Add to lineup
+            # Only the base_ids are kept; get_squad_update_embed resolves them against the catalog
+            squad_lineup = tuple(unit['unitDefId'].split(':')[0] for unit in entry['squad']['cell'])
 
             ranks[entry['tab']] = {
                 'rank': entry['rank'],
@@ -282,8 +303,52 @@ def fetch_pvp_ranks(ally_code: str):
 
         return ranks, name, utc_offset
     else:
-        print("Failed to fetch PvP ranks. Status code:", response.status_code)
+        print(f"Failed to fetch PvP ranks for ally code {ally_code}.")
         return None
+
+# Coalesces playerArena requests so each ally code is fetched at most once per tick.
+# Every consumer awaiting the same ally code shares the same parsed (ranks, name, utc_offset) result.
+class PvpRankCache:
+    # Result for ally codes left out of this tick: no ranks, so callers keep the stored state as-is
+    NOT_POLLED = (None, "", 0)
+
+    def __init__(self, concurrency=PVP_FETCH_CONCURRENCY, due=None):
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._requests = {}
+        self._due = due
+
+    async def _fetch(self, ally_code):
+        if self._due is not None and ally_code not in self._due:
+            return self.NOT_POLLED
+        async with self._semaphore:
+            try:
+                return await fetch_pvp_ranks(ally_code)
+            except Exception as e:
+                print(f"Error fetching PvP ranks for ally code {ally_code}: {e}")
+                return None
+
+    def get(self, ally_code):
+        # Reuse the in-flight (or finished) request if one already exists for this ally code
+        request = self._requests.get(ally_code)
+        if request is None:
+            request = asyncio.ensure_future(self._fetch(ally_code))
+            self._requests[ally_code] = request
+        return request
+
+    async def prefetch(self, ally_codes):
+        # Start every fetch at once (bounded by the semaphore) so a tick costs ~one round trip
+        await asyncio.gather(*(self.get(ally_code) for ally_code in ally_codes))
+
+async def fetch_pvp_ranks_concurrently(ally_codes, concurrency=PVP_FETCH_CONCURRENCY):
+    pvp_rank_cache = PvpRankCache(concurrency)
+    await pvp_rank_cache.prefetch(ally_codes)
+    return {ally_code: await pvp_rank_cache.get(ally_code) for ally_code in ally_codes}
+
+def get_tracked_ally_codes(user_info, arena_type: str):
+    arena_info = user_info.get(arena_type, {})
+    if not arena_info or arena_info.get("enabled") != True:
+        return []
+    return [user_info.get("ally_code")] + [opponent["ally_code"] for opponent in arena_info.get("opponent_rank_tracking", [])]
     
 def display_rank_changes(current_ranks):
     global PREVIOUS_RANKS  # Use the global variable
@@ -318,11 +383,11 @@ def display_rank_change(title, name, previous_rank, new_rank):
     return None
         
 async def get_ally_code(guild_name: str, player_name: str):
-    guild_id, member_count, _ = get_guild_info(guild_name) #  scheduled_raid_offset
+    guild_id, member_count, _ = await get_guild_info(guild_name) #  scheduled_raid_offset
     if guild_id:
-        player_id = get_player_id_from_guild(guild_id, player_name)
+        player_id = await get_player_id_from_guild(guild_id, player_name)
         if player_id:
-            ally_code = get_player_ally_code_by_id(player_id)
+            ally_code = await get_player_ally_code_by_id(player_id)
             if ally_code:
                 return ally_code
     return None
@@ -334,18 +399,13 @@ def look_up_fleet_user_info(user_id, ally_code=None):
     if user_info and user_info.get("fleetarena", {}).get("enabled"):
         return user_id, user_info
     
-    # If not enabled, look for the ally code in other users' opponent lists
-    for other_user_id, other_user_info in ally_code_tracking.items():
-        if other_user_id == user_id:
-            continue  # Skip the user's own info
-        
-        opponents = other_user_info.get("fleetarena", {}).get("opponent_rank_tracking", [])
-        if ally_code == None and user_info != None:
-            ally_code = user_info.get("ally_code")
+    # If not enabled, look for the user's ally code in other users' opponent lists
+    if ally_code == None and user_info != None:
+        ally_code = user_info.get("ally_code")
 
-            for opponent in opponents:
-                if ally_code and opponent["ally_code"] == ally_code:
-                    return other_user_id, other_user_info
+        for other_user_id in ally_code_index.trackers("fleetarena", ally_code):
+            if other_user_id != user_id:  # Skip the user's own info
+                return other_user_id, ally_code_tracking[other_user_id]
 
     return None, None  # Return None if no matching user_info found
 
@@ -378,7 +438,7 @@ def check_payout_time(utc_offset, arena_type):
 
     return is_payout, payout_time_epoch
 
-def fetch_payout_times(user_info, arena_type: str):
+async def fetch_payout_times(user_info, arena_type: str):
     payout_times = []
     arena_tab_num = 2 if arena_type == "fleetarena" else 1
 
@@ -386,9 +446,13 @@ def fetch_payout_times(user_info, arena_type: str):
     # Extract the ally codes for the user and opponents
     ally_codes = [user_info.get("ally_code")] + [opponent["ally_code"] for opponent in user_info.get(arena_type, {}).get("opponent_rank_tracking", [])]
 
+    # Fetch the PvP ranks and localTimeZoneOffsetMinutes for everyone at once
+    pvp_ranks = await fetch_pvp_ranks_concurrently(ally_codes)
+
     for ally_code in ally_codes:
-        # Fetch the PvP ranks and localTimeZoneOffsetMinutes
-        ranks, name, localTimeZoneOffsetMinutes = fetch_pvp_ranks(ally_code)
+        if pvp_ranks.get(ally_code) is None:
+            continue
+        ranks, name, localTimeZoneOffsetMinutes = pvp_ranks[ally_code]
 
         if localTimeZoneOffsetMinutes is not None:
             payout_time_utc = calculate_payout_time_utc(localTimeZoneOffsetMinutes, arena_type)
@@ -444,20 +508,17 @@ def get_squad_update_embed(updated_squad):
         save_time_in_seconds = 0
     save_time_str = f"<t:{save_time_in_seconds}:f>"
 
-    # Normalize squad_lineup to a list and build a safe, concise names string
-    squad_lineup = updated_squad.get('squad_lineup') or []
-    # Safely extract a name from each unit dict (or string fallback) without raising KeyError
+    # Resolve the stored base_ids against the character catalog, falling back to the base_id itself
+    squad_lineup = [base_id for base_id in updated_squad.get('squad_lineup') or [] if base_id]
+    characters = [load_character_base_id(base_id) for base_id in squad_lineup]
     unit_names = ", ".join(
-        (
-            (unit.get('name') if isinstance(unit, dict) else str(unit))
-            or (unit.get('unitDefId').split(':')[0] if isinstance(unit, dict) and unit.get('unitDefId') else "Unknown")
-        )
-        for unit in squad_lineup if unit
+        (character or {}).get('name') or base_id
+        for base_id, character in zip(squad_lineup, characters)
     ) or "Unknown Squad"
 
     # Add the first player's squad image as the embed's thumbnail if available
-    if squad_lineup and isinstance(squad_lineup[0], dict):
-        thumb_url = squad_lineup[0].get('image') or squad_lineup[0].get('portrait_url')
+    if characters and characters[0]:
+        thumb_url = characters[0].get('image') or characters[0].get('portrait_url')
         if thumb_url:
             try:
                 embed.set_thumbnail(url=thumb_url)
@@ -471,13 +532,17 @@ def get_squad_update_embed(updated_squad):
 
     return embed
 
-def get_player_info(user_id, user_info, arena_type: str, getAll: bool):
+async def get_player_info(user_id, user_info, arena_type: str, getAll: bool, pvp_rank_cache: PvpRankCache = None):
     arena_tab_num = 2 if arena_type == "fleetarena" else 1
     ally_code = user_info.get("ally_code")
     name = ""
     player_info_list = []
+    # Share this tick's playerArena responses when a cache is given, otherwise coalesce within this call
+    if pvp_rank_cache is None:
+        pvp_rank_cache = PvpRankCache()
+
     try:
-        current_ranks, name, utc_offset = fetch_pvp_ranks(ally_code)
+        current_ranks, name, utc_offset = await pvp_rank_cache.get(ally_code)
         if current_ranks is not None:
             # Compare current ranks with stored ranks
             is_payout, payout_time_epoch = check_payout_time(utc_offset, arena_type)
@@ -500,7 +565,7 @@ def get_player_info(user_id, user_info, arena_type: str, getAll: bool):
                 ally_code_tracking[user_id][arena_type]["squad_lineup"] = squad_lineup
                 
                 # Save the updated settings into the JSON file
-                save_ally_code_tracking()
+                save_ally_code_tracking(user_id)
 
                 player_info = {
                         "name": name,
@@ -519,7 +584,7 @@ def get_player_info(user_id, user_info, arena_type: str, getAll: bool):
 
     for opponent in user_info.get(arena_type, {}).get("opponent_rank_tracking", []):
             try:
-                opponent_current_ranks, opponent_name, opponent_utc_offset = fetch_pvp_ranks(opponent["ally_code"])
+                opponent_current_ranks, opponent_name, opponent_utc_offset = await pvp_rank_cache.get(opponent["ally_code"])
                 if opponent_current_ranks is not None:
                     is_opponent_payout, payout_time_epoch = check_payout_time(opponent_utc_offset, arena_type)
 
@@ -540,7 +605,7 @@ def get_player_info(user_id, user_info, arena_type: str, getAll: bool):
                         opponent["squad_lineup"] = squad_lineup
 
                         # Save the updated settings into the JSON file
-                        save_ally_code_tracking()
+                        save_ally_code_tracking(user_id)
 
                         # add player to list for generating messages
                         player_info = {
@@ -604,10 +669,10 @@ def get_payout_table(sorted_payout_times):
 
     return payout_table
 
-async def send_arena_monitoring_messages(user_id, user_info, arena_type: str):
+async def send_arena_monitoring_messages(user_id, user_info, arena_type: str, pvp_rank_cache: PvpRankCache = None):
     arena_string = "Fleet Arena" if arena_type == "fleetarena" else "Squad Arena"
     if user_info.get(arena_type, {}) and user_info.get(arena_type, {}).get("enabled") == True:
-        player_info_list, name = get_player_info(user_id, user_info, arena_type, False)
+        player_info_list, name = await get_player_info(user_id, user_info, arena_type, False, pvp_rank_cache)
         messages_to_send = []
         
         # Order the list of players by rank
@@ -657,11 +722,9 @@ async def send_arena_monitoring_messages(user_id, user_info, arena_type: str):
             guild = bot.get_guild(int(guild_id))
             if guild:
                 channel = guild.get_channel(int(channel_id))
-                for message in messages_to_send:
-                    try:
-                        await channel.send(embed=message)
-                    except DiscordServerError as e:
-                        print(f"Error sending discord message to channel {channel.name}: {e}")
+                if channel:
+                    # Packed up to 10 embeds per message and delivered in the background
+                    send_queue.enqueue(channel, messages_to_send)
     return
 
 # endregion
@@ -800,7 +863,8 @@ async def register_guildactivity(ctx: discord.ApplicationContext, guildname: str
     next_reset_time_str = f"<t:{int(next_reset_epoch.timestamp())}>"
     
     # Save the guild reset times into the JSON file
-    save_guild_reset_times()
+    save_guild_reset_times(str(ctx.guild_id))
+    reset_scheduler.update(("guild", str(ctx.guild_id)))
     await ctx.respond(f"Guild reset time has been registered successfully! Next reset time: {next_reset_time_str}")
 
 @register.command(
@@ -816,6 +880,7 @@ async def register_allycode(ctx: discord.ApplicationContext, ally_code: str):
 
     if ally_code is not None:
         ally_code_tracking[user_id]["ally_code"] = ally_code
+        save_ally_code_tracking(user_id)
 
     await ctx.respond(f"Ally code {ally_code} has been registered.")
 
@@ -833,7 +898,8 @@ async def unregister(ctx: discord.ApplicationContext):
     guild_reset_times[str(ctx.guild_id)] = {}
     print(f"Unregistered {ctx.guild_id}")
     
-    save_guild_reset_times()
+    save_guild_reset_times(str(ctx.guild_id))
+    reset_scheduler.update(("guild", str(ctx.guild_id)))
     await ctx.respond(f"Guild has been unregistered successfully.")
 
 @bot.slash_command(
@@ -878,9 +944,9 @@ async def subscribe(ctx: discord.ApplicationContext, timezone: str, timeformat:
     next_reset_time_str = f"<t:{int(next_reset_epoch.timestamp())}>"
     
     # Save the guild reset times into the JSON file
-    save_personal_reset_times()
-    user = await bot.fetch_user(ctx.user.id)
-    await user.send(f"Personal reset time has been subscribed successfully! Next reset time: {next_reset_time_str}")
+    save_personal_reset_times(str(ctx.user.id))
+    reset_scheduler.update(("personal", str(ctx.user.id)))
+    await dm_cache.send(ctx.user.id, f"Personal reset time has been subscribed successfully! Next reset time: {next_reset_time_str}")
 
 @bot.slash_command(
     name="unsubscribe",
@@ -890,7 +956,8 @@ async def unsubscribe(ctx: discord.ApplicationContext):
     # Clear the entry for the guild
     personal_reset_times[str(ctx.user.id)] = {}
     
-    save_personal_reset_times()
+    save_personal_reset_times(str(ctx.user.id))
+    reset_scheduler.update(("personal", str(ctx.user.id)))
     await ctx.respond(f"User has been unsubscribed successfully.")
 
 # endregion
@@ -927,7 +994,7 @@ async def monitor(ctx: discord.ApplicationContext):
     await ctx.defer()
     if ctx.channel_id not in channels:
         channels.append(ctx.channel_id)
-        save_channels()
+        save_channels(ctx.channel_id)
 
         await ctx.respond(f"Now monitoring messages for channel <#{ctx.channel_id}>")
     else:
@@ -942,12 +1009,29 @@ async def unmonitor(ctx: discord.ApplicationContext):
 
     if ctx.channel_id in channels:
         channels.remove(ctx.channel_id)
-        save_channels()
+        save_channels(ctx.channel_id)
 
         await ctx.respond(f"No longer monitoring messages for channel <#{ctx.channel_id}>")
     else:
         await ctx.respond(f"Messages were not being monitored for channel <#{ctx.channel_id}>")
 
+@bot.slash_command(
+        name="queues",
+        description="Show how much work the bot has queued",
+)
+async def queues(ctx: discord.ApplicationContext):
+    embed = discord.Embed(title="Work Queues", color=0x8B10E3)
+    for name, metrics in work_scheduler.metrics().items():
+        embed.add_field(
+            name=f"Comlink ({name})",
+            value=f"Running: `{metrics['running']}/{metrics['budget']}`\nWaiting: `{metrics['waiting']}`\nCompleted: `{metrics['completed']:,}`",
+            inline=True
+        )
+    embed.add_field(name="Mod card renders", value=f"`{render_pool.pending}/{render_pool.max_pending}`", inline=True)
+    embed.add_field(name="Inventory uploads", value=f"`{inventory_queue.qsize()}/{INVENTORY_QUEUE_DEPTH}`", inline=True)
+    embed.add_field(name="Outgoing embeds", value=f"`{send_queue.pending()}`", inline=True)
+    await ctx.respond(embed=embed)
+
 def calculate_left_to_farm(shard_string):
     # calculate shards left to farm
     try:
@@ -1139,14 +1223,27 @@ async def mods(ctx: discord.ApplicationContext, character: str):
     mod_info = get_character_mod_info(character)
 
     if mod_info is None:
-        ctx.respond("Please select a valid character within the character option.")
+        await ctx.respond("Please select a valid character within the character option.")
+        return
     
-    output_image_path = "output_image.png"
-    create_image_with_mods(output_image_path, mod_info["character_name"], mod_info["portrait_url"], mod_info["recommended_stats"], mod_info["mod_sets"])
+    # Rendered cards are cached by recommendation, so repeat lookups skip Pillow entirely
+    png_bytes = mod_card_cache.get(mod_card_cache.key(mod_info))
+    if png_bytes is None:
+        # Rendering is CPU bound, so defer the response and draw on the render pool
+        await ctx.defer()
+        try:
+            png_bytes = await render_pool.run(mod_card_cache.get_or_render, mod_info)
+        except WorkerPoolFull:
+            await ctx.followup.send("Beep boop! I'm busy drawing other mod cards right now. Please try again in a moment.")
+            return
+        except Exception as e:
+            # Always answer the deferred interaction, or it sits on "thinking..." until Discord times it out
+            print(f"Error rendering mod card for {character}: {e}")
+            await ctx.followup.send("Beep boop! Something went wrong drawing that mod card. Please try again later.")
+            return
     
-    # Send the image as a response
-    with open(output_image_path, 'rb') as image_file:
-        await ctx.respond(file=discord.File(image_file, 'mod_info_image.png'))
+    # Send the image as a response from memory so concurrent users never share a file
+    await ctx.respond(file=discord.File(io.BytesIO(png_bytes), 'mod_info_image.png'))
 
 @print_and_ignore_exceptions
 async def primary_stat_autocomplete(ctx: discord.AutocompleteContext):
@@ -1267,7 +1364,7 @@ async def enable(ctx: discord.ApplicationContext, ally_code: str, user: discord.
             await ctx.respond("Please /register your ally code...")
             return
 
-    ranks_result, name, utc_offset = fetch_pvp_ranks(ally_code)
+    ranks_result, name, utc_offset = await fetch_pvp_ranks(ally_code)
 
     fleetarena_settings = {
         "guild_id": ctx.guild_id,
@@ -1283,7 +1380,7 @@ async def enable(ctx: discord.ApplicationContext, ally_code: str, user: discord.
     ally_code_tracking[user_id]["fleetarena"] = fleetarena_settings
     
     # Save the updated settings into the JSON file
-    save_ally_code_tracking()
+    save_ally_code_tracking(user_id)
 
     await ctx.respond(f'Fleet arena monitoring has been enabled successfully for `{name}` at Rank `{ranks_result[2]["rank"]}` in channel <#{ctx.channel_id}>!')
 
@@ -1300,7 +1397,7 @@ async def disable_fleet_arena(ctx: discord.ApplicationContext):
         return
 
     ally_code_tracking[user_id]["fleetarena"]["enabled"] = False
-    save_ally_code_tracking()
+    save_ally_code_tracking(user_id)
 
     await ctx.respond("Fleet arena monitoring has been disabled successfully!")
 
@@ -1342,7 +1439,7 @@ async def add_player(ctx: discord.ApplicationContext, guild_name: str, player_na
             return
 
         # Retrieve the fleet rank from the player's PvP profile
-        ranks_result, name, utc_offset = fetch_pvp_ranks(ally_code)
+        ranks_result, name, utc_offset = await fetch_pvp_ranks(ally_code)
         if ranks_result is not None:
             fleet_rank = ranks_result.get(2, {}).get('rank')
             if fleet_rank:
@@ -1356,7 +1453,7 @@ async def add_player(ctx: discord.ApplicationContext, guild_name: str, player_na
                 user_info["fleetarena"]["opponent_rank_tracking"].append(opponent)
 
                 # Save the updated settings into the JSON file
-                save_ally_code_tracking()
+                save_ally_code_tracking(user_id)
 
                 await ctx.respond(f'Player {player_name or ally_code} added successfully to <@{user_id}>\'s fleet arena tracking at Rank {fleet_rank}!\n\nAlly code: {ally_code}')
         else:
@@ -1397,7 +1494,7 @@ async def remove_player(ctx: discord.ApplicationContext, player_name: str = None
     for opponent in opponents:
         if opponent["ally_code"] == ally_code or opponent["name"] == player_name:
             opponents.remove(opponent)
-            save_ally_code_tracking()
+            save_ally_code_tracking(user_id)
             await ctx.respond(f'Player {player_name or ally_code} removed successfully from <@{user_id}>\'s fleet arena tracking.')
             return
 
@@ -1416,7 +1513,7 @@ async def display_fleet_arena(ctx: discord.ApplicationContext):
     arena_user_id, user_info = look_up_fleet_user_info(str(ctx.user.id))
     if user_info is not None and user_info != {} and user_info.get("ally_code") is not None:
         if user_info.get(arena_type, {}) and user_info.get(arena_type, {}).get("enabled") == True:
-            player_info_list, name = get_player_info(arena_user_id, user_info, arena_type, True)
+            player_info_list, name = await get_player_info(arena_user_id, user_info, arena_type, True)
             
             # Order the list of players by rank
             sorted_player_info_list = sorted(player_info_list, key=lambda x: x["rank"])
@@ -1442,7 +1539,7 @@ async def display_fleet_payouts(ctx: discord.ApplicationContext):
     
     if user_info:
         # Fetch and sort payout times
-        payout_times = fetch_payout_times(user_info, arena_type)
+        payout_times = await fetch_payout_times(user_info, arena_type)
         sorted_payout_times = sorted(payout_times, key=lambda x: x["payout_time_epoch"])
 
         # Construct the payout table
@@ -1492,7 +1589,7 @@ async def enable(ctx: discord.ApplicationContext, ally_code: str):
             await ctx.respond("Please /register your ally code...")
             return
 
-    ranks_result, name, utc_offset = fetch_pvp_ranks(ally_code)
+    ranks_result, name, utc_offset = await fetch_pvp_ranks(ally_code)
 
     squadarena_settings = {
         "guild_id": ctx.guild_id,
@@ -1509,7 +1606,7 @@ async def enable(ctx: discord.ApplicationContext, ally_code: str):
     ally_code_tracking[user_id]["squadarena"] = squadarena_settings
     
     # Save the updated settings into the JSON file
-    save_ally_code_tracking()
+    save_ally_code_tracking(user_id)
 
     await ctx.respond(f'Squad arena monitoring has been enabled successfully for `{name}` at Rank `{ranks_result[1]["rank"]}`!')
     return
@@ -1527,7 +1624,7 @@ async def disable_squad_arena(ctx: discord.ApplicationContext):
         return
 
     ally_code_tracking[user_id]["squadarena"]["enabled"] = False
-    save_ally_code_tracking()
+    save_ally_code_tracking(user_id)
 
     await ctx.respond("Squad arena monitoring has been disabled successfully!")
 # endregion
@@ -1555,7 +1652,7 @@ async def set_raid_channel(ctx: discord.ApplicationContext, channel: discord.Tex
         return
 
     guild_reset_times[guild_id]["raid_channel_id"] = channel.id
-    save_guild_reset_times()
+    save_guild_reset_times(guild_id)
 
     await ctx.respond(f"Raid notification channel set to {channel.mention}")
 
@@ -1577,7 +1674,7 @@ async def set_tickets(ctx: discord.ApplicationContext, tickets: int, raid_end_ep
     guild_id = str(ctx.guild.id)
     guild_reset_times[guild_id]["current_tickets"] = tickets
     guild_reset_times[guild_id]["raid_end_epoch"] = raid_end_epoch or 0
-    save_guild_reset_times()
+    save_guild_reset_times(guild_id)
     await ctx.respond(f"Current tickets set to `{tickets:,}`. Raid end time set to <t:{raid_end_epoch}:F>." if raid_end_epoch else f"Current tickets set to `{tickets:,}`. No active raid.")
 
 @raid.command(
@@ -1596,9 +1693,9 @@ async def show_raid_status(ctx: discord.ApplicationContext):
     
     # If scheduled raid offset is missing, retrieve and store it
     if not scheduled_raid_offset:
-        _, _, scheduled_raid_offset = get_guild_info(guildname)
+        _, _, scheduled_raid_offset = await get_guild_info(guildname)
         guild_reset_times[guild_id]["scheduled_raid_offset"] = int(scheduled_raid_offset)
-        save_guild_reset_times()
+        save_guild_reset_times(guild_id)
     
     if raid_end_epoch:
         # Display the raid end time if a raid is active
@@ -1653,92 +1750,140 @@ async def update_mod_data():
     try:
         # Keep mod data check separate (may be synchronous)
         check_and_update_mod_data()
+        # Drop rendered mod cards whose recommendation changed
+        mod_card_cache.retain(load_mod_data())
     except Exception as e:
         print(f"Error while checking/updating mod data: {e}")
 
+    try:
+        # Prefetch new portraits and revalidate old ones so /mods never waits on swgoh.gg
+        mod_data = load_mod_data()
+        changed_portraits = await portrait_cache.refresh([mod_info["portrait_url"] for mod_info in mod_data])
+        for mod_info in mod_data:
+            if mod_info["portrait_url"] in changed_portraits:
+                mod_card_cache.discard(mod_card_cache.key(mod_info))
+    except Exception as e:
+        print(f"Warning: failed to refresh character portraits: {e}")
+
     try:
         await update_all_characters_cache()
     except Exception as e:
         # Prevent the background task from crashing the whole bot when external API is unavailable
         print(f"Warning: failed to update character cache: {e}")
 
-@tasks.loop(minutes=1)
+def get_key_reset_schedule(key):
+    # Schedule for a guild's daily message or a subscriber's personal message, or None if there isn't one
+    kind, entity_id = key
+    if kind == "guild":
+        reset_info = guild_reset_times.get(entity_id)
+        if not reset_info or not reset_info.get("dailymessages"):
+            return None
+        return get_reset_schedule(reset_info["resethour"], reset_info["timeformat"], reset_info["timezone"], reset_info["dst"])
+
+    user_info = personal_reset_times.get(entity_id)
+    if not user_info:
+        return None
+    return get_reset_schedule(user_info["resethour"], user_info["timeformat"], user_info["timezone"], user_info["dst"], True)
+
+def next_reset_time(key):
+    schedule = get_key_reset_schedule(key)
+    return schedule.next_reset().timestamp() if schedule else None
+
+def following_reset_time(key, reset_epoch):
+    # The reset after the one firing now, with that day's own DST offset (not simply +24h)
+    schedule = get_key_reset_schedule(key)
+    if schedule is None:
+        return None
+    return schedule.next_resets(2, datetime.fromtimestamp(reset_epoch - 1, UTC))[1].timestamp()
+
+async def fire_reset(key, reset_epoch):
+    kind, entity_id = key
+    if kind == "guild":
+        await send_daily_message(entity_id, reset_epoch)
+    else:
+        await send_daily_personal_message(entity_id, reset_epoch)
+
+reset_scheduler = ResetScheduler(next_reset_time, fire_reset)
+
 @print_and_ignore_exceptions
-async def send_daily_message():
-    for guild_id, reset_info in guild_reset_times.items():
-        if reset_info != None and reset_info != {} and reset_info.get("dailymessages") != None and reset_info.get("dailymessages"):
-            reset_hour = reset_info["resethour"]
-            timezone = reset_info["timezone"]
-            timeformat = reset_info["timeformat"]
-            dst = reset_info["dst"]
-            reset_datetime = calculate_next_reset_epoch(reset_hour, timeformat, timezone, dst, True)
-            next_reset_time_str = f"<t:{int(reset_datetime.timestamp())}>"
-            
-            # this grabs the channel information to send the message
-            guild = bot.get_guild(int(guild_id))
-            if guild:
-                channel_id = guild_reset_times[guild_id]["channelid"]
-                channel = guild.get_channel(int(channel_id))
-                # if channel:
-                #     await channel.send(f"Testing: {next_reset_time_str}")
-            current_epoch = datetime.now().timestamp()
-            reset_epoch = reset_datetime.timestamp()
-            if current_epoch >= reset_epoch and current_epoch < reset_epoch + 60: # this is the normal reset logic for each day
-            # if current_epoch >= reset_epoch and (current_epoch - reset_epoch) % 3600 < 60: # this is an hourly tester
-                if channel:
-                    reset_datetime += timedelta(days=1) # this will show what the next reset time is 
-                    next_reset_time_str = f"<t:{int(reset_datetime.timestamp())}>" 
-                    day = datetime.now().strftime("%A")
-                    await channel.send(embed=get_activity_message(day, False, next_reset_time_str))
+async def send_daily_message(guild_id, reset_epoch):
+    reset_info = guild_reset_times.get(guild_id)
+    if not reset_info:
+        return
+
+    # this grabs the channel information to send the message
+    guild = bot.get_guild(int(guild_id))
+    channel = guild.get_channel(int(reset_info["channelid"])) if guild else None
+    following_reset = following_reset_time(("guild", guild_id), reset_epoch)
+    if channel and following_reset:
+        next_reset_time_str = f"<t:{int(following_reset)}>" # this will show what the next reset time is
+        day = datetime.now().strftime("%A")
+        await channel.send(embed=get_activity_message(day, False, next_reset_time_str))
 
-@tasks.loop(minutes=1)
 @print_and_ignore_exceptions
-async def send_daily_personal_message():
-    for user_id, user_info in personal_reset_times.items():
-        if user_info != None and user_info != {}:
-            user_reset_hour = user_info["resethour"]
-            user_timezone = user_info["timezone"]
-            user_timeformat = user_info["timeformat"]
-            guildid = user_info["guildid"]
-            dst = user_info["dst"]
-            reset_datetime = calculate_next_reset_epoch(user_reset_hour, user_timeformat, user_timezone, dst, True, True)
-            next_reset_time_str = f"<t:{int(reset_datetime.timestamp())}>"
-
-            # Check the guildid to see if we have its reset time to add to the card
-            next_guild_reset_time_str = None
-            if str(guildid) in guild_reset_times:
-                guildinfo = guild_reset_times[str(guildid)]
-                if guildinfo != None and guildinfo != {}:
-                    guild_reset_hour = guildinfo["resethour"]
-                    guild_timezone = guildinfo["timezone"]
-                    guild_timeformat = guildinfo["timeformat"]
-                    guild_dst = guildinfo["dst"]
-                    guild_reset_datetime = calculate_next_reset_epoch(guild_reset_hour, guild_timeformat, guild_timezone, guild_dst, False) # Grab tomorrows reset time
-                    next_guild_reset_time_str = f"<t:{int(guild_reset_datetime.timestamp())}>"
-            
-            # this grabs the user information to send the message
-            user = await bot.fetch_user(int(user_id))
-            now = datetime.now(ZoneInfo(user_timezone))
-            current_epoch = now.timestamp()
-            reset_epoch = reset_datetime.timestamp()
-            if current_epoch >= reset_epoch and current_epoch < reset_epoch + 60: # this is the normal reset logic for each day
-            # if current_epoch >= reset_epoch and (current_epoch - reset_epoch) % 3600 < 60: # this is an hourly tester
-                if user:
-                    reset_datetime += timedelta(days=1) # this will show what the next reset time is 
-                    next_reset_time_str = f"<t:{int(reset_datetime.timestamp())}>"
-                    # need to grab the next day if the reset time is before midnight
-                    day = now
-                    if now.hour >= 1:
-                        day += timedelta(days=1)
-                    
-                    await user.send(embed=get_activity_message(day.strftime("%A"), True, next_guild_reset_time_str, next_reset_time_str))
+async def send_daily_personal_message(user_id, reset_epoch):
+    user_info = personal_reset_times.get(user_id)
+    if not user_info:
+        return
+
+    # Check the guildid to see if we have its reset time to add to the card
+    next_guild_reset_time_str = None
+    guildinfo = guild_reset_times.get(str(user_info["guildid"]))
+    if guildinfo:
+        guild_reset_datetime = calculate_next_reset_epoch(guildinfo["resethour"], guildinfo["timeformat"], guildinfo["timezone"], guildinfo["dst"], False) # Grab tomorrows reset time
+        next_guild_reset_time_str = f"<t:{int(guild_reset_datetime.timestamp())}>"
+
+    # this grabs the user's DM channel to send the message, only now that it is due
+    channel = await dm_cache.get_channel(user_id)
+    following_reset = following_reset_time(("personal", user_id), reset_epoch)
+    if channel and following_reset:
+        next_reset_time_str = f"<t:{int(following_reset)}>" # this will show what the next reset time is
+        # need to grab the next day if the reset time is before midnight
+        day = datetime.now(ZoneInfo(user_info["timezone"]))
+        if day.hour >= 1:
+            day += timedelta(days=1)
+
+        await dm_cache.send(user_id, embed=get_activity_message(day.strftime("%A"), True, next_guild_reset_time_str, next_reset_time_str))
+
+@tasks.loop(count=1)
+async def run_reset_scheduler():
+    # Sleeps until the earliest guild or personal reset instead of polling every minute
+    await reset_scheduler.run()
+
+arena_poll_schedule = ArenaPollSchedule()
 
 @tasks.loop(minutes=1)
-async def check_pvp_ranks():   
-    for user_id, user_info in ally_code_tracking.items():
-        if user_info is not None and user_info != {} and user_info.get("ally_code") is not None:
-            await send_arena_monitoring_messages(user_id, user_info, "fleetarena")
-            await send_arena_monitoring_messages(user_id, user_info, "squadarena")
+async def check_pvp_ranks():
+    tracked_users = [
+        (user_id, user_info) for user_id, user_info in list(ally_code_tracking.items())
+        if user_info is not None and user_info != {} and user_info.get("ally_code") is not None
+    ]
+
+    # Gather every distinct ally code up front and fetch them concurrently. One /playerArena
+    # response holds both arena tabs, so fleet and squad share the same per-tick cache.
+    ally_codes = set()
+    for _, user_info in tracked_users:
+        ally_codes.update(get_tracked_ally_codes(user_info, "fleetarena"))
+        ally_codes.update(get_tracked_ally_codes(user_info, "squadarena"))
+    # Only poll the players whose adaptive interval is up; the rest are skipped this tick.
+    # Schedule from the tick's start so a slow prefetch can't push next polls past the next tick.
+    now = time.time()
+    arena_poll_schedule.retain(ally_codes)
+    due = arena_poll_schedule.due(ally_codes, now)
+    pvp_rank_cache = PvpRankCache(due=due)
+    await pvp_rank_cache.prefetch(due)
+    for ally_code in due:
+        result = await pvp_rank_cache.get(ally_code)
+        if result is None:
+            arena_poll_schedule.record(ally_code, None, [], now=now)
+            continue
+        ranks, _, utc_offset = result
+        payout_epochs = [calculate_payout_time_utc(utc_offset, arena_type).timestamp() for arena_type in ("fleetarena", "squadarena")]
+        arena_poll_schedule.record(ally_code, {tab: ranking["rank"] for tab, ranking in ranks.items()}, payout_epochs, now=now)
+
+    for user_id, user_info in tracked_users:
+        await send_arena_monitoring_messages(user_id, user_info, "fleetarena", pvp_rank_cache)
+        await send_arena_monitoring_messages(user_id, user_info, "squadarena", pvp_rank_cache)
 
 @tasks.loop(minutes=1)
 @print_and_ignore_exceptions
@@ -1756,10 +1901,10 @@ async def check_raid_conditions():
                 current_tickets = reset_info.get("current_tickets", 0)
                 scheduled_raid_offset = reset_info.get("scheduled_raid_offset", 0)
                 if not scheduled_raid_offset:
-                    _, _, scheduled_raid_offset = get_guild_info(guildname) # guild_id, member_count, scheduled_raid_offset
+                    _, _, scheduled_raid_offset = await get_guild_info(guildname) # guild_id, member_count, scheduled_raid_offset
                     if scheduled_raid_offset != None:
                         guild_reset_times[guild_id]["scheduled_raid_offset"] = int(scheduled_raid_offset)
-                        save_guild_reset_times()
+                        save_guild_reset_times(guild_id)
 
                 # Check and calculate launch time
                 if scheduled_raid_offset is not None:
@@ -1776,11 +1921,11 @@ async def check_raid_conditions():
                     # Verify if the launch time has passed
                     if current_epoch >= launch_epoch:
                         # Re-query the guild information to verify scheduled_raid_offset
-                        _, _, new_scheduled_raid_offset = get_guild_info(guildname)
+                        _, _, new_scheduled_raid_offset = await get_guild_info(guildname)
                         if new_scheduled_raid_offset != None and int(new_scheduled_raid_offset) != scheduled_raid_offset:
                             scheduled_raid_offset = int(new_scheduled_raid_offset)
                             guild_reset_times[guild_id]["scheduled_raid_offset"] = scheduled_raid_offset
-                            save_guild_reset_times()
+                            save_guild_reset_times(guild_id)
 
                             # Recalculate launch time with the updated offset
                             launch_datetime = datetime.now(UTC).replace(hour=0, minute=0, second=0) + timedelta(seconds=scheduled_raid_offset)
@@ -1798,7 +1943,7 @@ async def check_raid_conditions():
 
                                 # Decrease the tickets by 180,000
                                 guild_reset_times[guild_id]["current_tickets"] -= 180000
-                                save_guild_reset_times()
+                                save_guild_reset_times(guild_id)
 
                                 # Send the raid launch message
                                 if raid_channel:
@@ -1815,17 +1960,21 @@ async def check_raid_conditions():
                             await raid_channel.send(f"⏰ Raid ends in 12 hours!\n\n> Use Hotbot `/raids notify mindamage:0` to notify players who haven't attacked yet.\n\n*Anyone with a Hotbot connection can use that command*")
                             guild_reset_times[guild_id]["second_raid_reminder"] = True
                             guild_reset_times[guild_id]["first_raid_reminder"] = True
-                            save_guild_reset_times()          
+                            save_guild_reset_times(guild_id)
                         # Check if 12 hours remain
                         elif time_until_end <= 24 * 3600 and not reset_info.get("first_raid_reminder"):
                             await raid_channel.send(f"⏰ Raid ends in 24 hours!\n\n> Use Hotbot `/raids notify mindamage:0` to notify players who haven't attacked yet.\n\n*Anyone with a Hotbot connection can use that command*")
                             guild_reset_times[guild_id]["first_raid_reminder"] = True
-                            save_guild_reset_times()
+                            save_guild_reset_times(guild_id)
                     else:
                         guild_reset_times[guild_id]["raid_end_epoch"] = 0
                         guild_reset_times[guild_id]["first_raid_reminder"] = False
                         guild_reset_times[guild_id]["second_raid_reminder"] = False
-                        save_guild_reset_times()
+                        save_guild_reset_times(guild_id)
+
+@tasks.loop(seconds=STATE_FLUSH_SECONDS)
+async def flush_state():
+    await state.flush()
 
 @update_mod_data.before_loop
 async def before_update_mod_data():
@@ -1833,23 +1982,30 @@ async def before_update_mod_data():
     await bot.wait_until_ready()
     print("Polling every 30 minutes to check and update mod data!")
 
-@send_daily_message.before_loop
-async def before_send_daily_message():
-    print("Configuring automated Guild messages...")
-    await bot.wait_until_ready()
-    print("Polling every minute to send daily Guild messages!")
-
-@send_daily_personal_message.before_loop
-async def before_send_daily_personal_message():
-    print("Configuring automated Personal messages...")
+@run_reset_scheduler.before_loop
+async def before_run_reset_scheduler():
+    print("Configuring automated Guild and Personal messages...")
     await bot.wait_until_ready()
-    print("Polling every minute to send daily Personal messages!")
+    keys = [("guild", guild_id) for guild_id in guild_reset_times] + [("personal", user_id) for user_id in personal_reset_times]
+    schedules = {}
+    for key in keys:
+        try:
+            schedule = get_key_reset_schedule(key)
+        except Exception as e:
+            print(f"Could not schedule reset for {key}: {e}")
+            continue
+        if schedule:
+            schedules[key] = schedule
+    # Evaluate every registration against the same clock in one pass
+    for key, reset_epoch in next_reset_epochs(schedules).items():
+        reset_scheduler.schedule(key, reset_epoch)
+    print(f"Scheduled {len(reset_scheduler)} daily Guild and Personal messages!")
 
 @check_pvp_ranks.before_loop
 async def before_check_pvp_ranks():
     print("Configuring automated PvP Rank Checking...")
     await bot.wait_until_ready()
-    print("Polling every minute to check PvP ranks!")
+    print("Polling arena ranks every minute near payout or after rank changes, backing off for idle players!")
 
 @check_raid_conditions.before_loop
 async def before_check_raid_conditions():
@@ -1902,6 +2058,51 @@ def parse_ticket_message(message, monitorAll: bool):
 
     return total_members_missed, total_tickets_missed
 
+# Inventory uploads are parsed by a few background workers so on_message only has to enqueue them
+inventory_queue = asyncio.Queue(maxsize=INVENTORY_QUEUE_DEPTH)
+inventory_jobs_in_flight = set() # user ids with an upload queued or being parsed
+inventory_workers = []
+
+def start_inventory_workers():
+    # on_ready fires again after reconnects, so only start the workers once
+    if not inventory_workers:
+        for _ in range(INVENTORY_WORKERS):
+            inventory_workers.append(asyncio.create_task(inventory_worker()))
+
+async def inventory_worker():
+    # Uploads are user-facing, so the parse's Comlink calls run ahead of the background loops
+    current_priority.set(INTERACTIVE)
+    while True:
+        message, attachment, user_id = await inventory_queue.get()
+        try:
+            await run_inventory_job(message, attachment)
+        except Exception as e:
+            print(f"Error parsing inventory {attachment.filename} for user {user_id}: {e}")
+            await set_inventory_reaction(message, "❌")
+        finally:
+            inventory_jobs_in_flight.discard(user_id)
+            inventory_queue.task_done()
+
+async def set_inventory_reaction(message, emoji):
+    try:
+        await message.remove_reaction("⏳", bot.user)
+        await message.add_reaction(emoji)
+    except discord.HTTPException as e:
+        print(f"Could not update inventory progress reaction: {e}")
+
+async def run_inventory_job(message, attachment):
+    # Read the file into memory and process it
+    inventory_bytes = await attachment.read()
+    
+    # Call the parsing function
+    (csv_filename, csv_buffer), (gear_import_filename, gear_import_buffer) = await parse_inventory_file(inventory_bytes)
+    
+    # Send the output CSV file to the user
+    await message.channel.send("I parsed your inventory.json file into a readable CSV! Beep boop!\n\n> Feel free to reply to a message with an inventory.json file and tag me! If you are registered with my `/register allycode` command, I'll respond.", file=discord.File(csv_buffer, filename=csv_filename))
+    gzip_note = "\n\n> The script was large, so I gzipped it. Unzip it before pasting." if gear_import_filename.endswith(".gz") else ""
+    await message.channel.send(f"I also created a file of javascript code to import your gear into https://gear.swgohevents.com/updateGear. You will have to paste the code into the console and it should update all of your equipment on their website.{gzip_note}", file=discord.File(gear_import_buffer, filename=gear_import_filename))
+    await set_inventory_reaction(message, "✅")
+
 # Shared function to process the attachment
 async def process_attachment(message):
     filename = ""
@@ -1912,28 +2113,37 @@ async def process_attachment(message):
             filename = attachment.filename
             
             # Find the Discord user ID associated with the ally code
-            user_id = next((user_id for user_id, ally in ally_code_tracking.items() if ally["ally_code"] == ally_code_from_filename), None)
+            user_id = ally_code_index.owner(ally_code_from_filename)
             
             if user_id is not None:
-                # Look up the user by their Discord ID
-                user = await bot.fetch_user(int(user_id))
-
-                # Download the file and process it
-                file_path = f"./{attachment.filename}"
-                await attachment.save(file_path)
-                
-                # Call the parsing function
-                csv_file_path, gear_import_path = parse_inventory_file(file_path)
-                
-                # Send the output CSV file to the user
-                await message.channel.send("I parsed your inventory.json file into a readable CSV! Beep boop!\n\n> Feel free to reply to a message with an inventory.json file and tag me! If you are registered with my `/register allycode` command, I'll respond.", file=discord.File(csv_file_path))
-                await message.channel.send("I also created a file of javascript code to import your gear into https://gear.swgohevents.com/updateGear. You will have to paste the code into the console and it should update all of your equipment on their website.", file=discord.File(gear_import_path))
-                
-                # Clean up
-                os.remove(file_path)
-                os.remove(csv_file_path)
-                os.remove(gear_import_path)
-
+                # Only one upload per user is parsed at a time
+                if user_id in inventory_jobs_in_flight:
+                    await message.channel.send(f"Beep boop! I'm still working on the last inventory for <@{user_id}>.")
+                    return
+
+                if inventory_queue.full():
+                    await message.channel.send("Beep boop! I have too many inventories to parse right now. Please try again in a few minutes.")
+                    return
+                inventory_jobs_in_flight.add(user_id)
+
+                # Show that the upload is queued; the worker swaps this for ✅ or ❌
+                try:
+                    await message.add_reaction("⏳")
+                except discord.HTTPException as e:
+                    print(f"Could not add inventory progress reaction: {e}")
+
+                try:
+                    inventory_queue.put_nowait((message, attachment, user_id))
+                except asyncio.QueueFull:
+                    # Another upload took the last slot while the reaction was being added
+                    inventory_jobs_in_flight.discard(user_id)
+                    try:
+                        await message.remove_reaction("⏳", bot.user)
+                    except discord.HTTPException as e:
+                        print(f"Could not remove inventory progress reaction: {e}")
+                    await message.channel.send("Beep boop! I have too many inventories to parse right now. Please try again in a few minutes.")
+                    return
+                start_inventory_workers()
                 return
     
     # if filename == "":
@@ -1943,6 +2153,7 @@ async def process_attachment(message):
 async def on_message(message):
     if message.author == bot.user: # skip own messages
             return
+    current_priority.set(INTERACTIVE) # each event runs in its own task, so this only covers this message
     
     if "inventory attached" in message.content.lower():
         if message.attachments:
@@ -1968,7 +2179,7 @@ async def on_message(message):
             # I also want to check if the guild that has monitoring enabled has a guild name in our json so I can check their members
             guildname = guild_reset_times[str(message.guild.id)]["guildname"]
             if guildname is not None:
-                _, member_count, scheduled_raid_offset = get_guild_info(guildname) # guild_id, member_count, scheduled_raid_offset
+                _, member_count, scheduled_raid_offset = await get_guild_info(guildname) # guild_id, member_count, scheduled_raid_offset
                 if member_count is not None and member_count > 0:
                     total_missing = total_tickets_missed + (50 - member_count) * 600
                     increment_tickets(str(message.guild.id), 30000 - total_missing)  # Update tickets
@@ -1984,9 +2195,11 @@ async def on_message(message):
     
 
 # Run the bot
+migrate_squad_lineups()
+render_assets.preload()
 update_mod_data.start()
-send_daily_message.start()
-send_daily_personal_message.start()
+run_reset_scheduler.start()
 check_pvp_ranks.start()
 check_raid_conditions.start()
+flush_state.start()
 bot.run(BOT_TOKEN)
\ No newline at end of file
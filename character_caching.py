@@ -2,11 +2,14 @@ import aiohttp
 import asyncio
 import json
 import os
+import time
 from datetime import datetime, timedelta
 import discord
 from functools import wraps
+from search_index import NameSearchIndex
 
 CACHE_FILE = "all_characters_cache.json"
+CATALOG_STAT_INTERVAL = 5 # seconds between mtime checks of the cache file
 
 def print_and_ignore_exceptions(func):
     @wraps(func)
@@ -19,36 +22,80 @@ def print_and_ignore_exceptions(func):
             print(f"Unexpected error in {func.__name__}: {str(e)}")
     return wrapper
 
+class CharacterCatalog:
+    """Process-wide view of the character/ship cache file with lookup indexes.
+
+    The file is parsed once and only re-read when its mtime changes.
+    """
+    def __init__(self, cache_file=CACHE_FILE):
+        self.cache_file = cache_file
+        self.data = None
+        self.by_name = {}
+        self.by_base_id = {}
+        self.search_index = NameSearchIndex([])
+        self._mtime = None
+        self._checked_at = None
+
+    def _index(self, data):
+        self.data = data
+        self.by_name = {}
+        self.by_base_id = {}
+        # setdefault keeps the first match, same as the old linear scan
+        for item in data or []:
+            self.by_name.setdefault(item['name'].lower(), item)
+            self.by_base_id.setdefault(item['base_id'].lower(), item)
+        self.search_index = NameSearchIndex([item['name'] for item in data or []])
+
+    def refresh(self):
+        # Reload only when the file on disk changed since we last read it
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < CATALOG_STAT_INTERVAL:
+            return
+        self._checked_at = now
+        try:
+            mtime = os.path.getmtime(self.cache_file)
+        except OSError:
+            self._mtime = None
+            self._index(None)
+            return
+        if mtime != self._mtime:
+            with open(self.cache_file, "r") as json_file:
+                self._index(json.load(json_file))
+            self._mtime = mtime
+
+    def replace(self, data):
+        # Called right after new data was written so the next lookup doesn't re-parse the file
+        self._index(data)
+        self._mtime = os.path.getmtime(self.cache_file) if os.path.exists(self.cache_file) else None
+
+    def get_data(self):
+        self.refresh()
+        return self.data
+
+    def search(self, text: str, limit: int = 25):
+        self.refresh()
+        return self.search_index.search(text, limit)
+
+    def by_character_name(self, character_name: str):
+        self.refresh()
+        return self.by_name.get(character_name.lower())
+
+    def by_character_base_id(self, character_base_id: str):
+        self.refresh()
+        return self.by_base_id.get(character_base_id.lower())
+
+character_catalog = CharacterCatalog()
+
 def load_character_data():
-    if os.path.exists(CACHE_FILE):
-        with open(CACHE_FILE, "r") as json_file:
-            return json.load(json_file)
-    else:
-        return None
+    return character_catalog.get_data()
 
 def load_character(character_name: str):
-    character_data = load_character_data()
-    if not character_data:
-        return None  # Cache doesn't exist or is empty
-
-    # Search for the character object by name
-    for character in character_data:
-        if character['name'].lower() == character_name.lower():
-            return character
-    
-    return None  # Character not found
+    # Returns None if the cache doesn't exist or the character isn't found
+    return character_catalog.by_character_name(character_name)
 
 def load_character_base_id(character_base_id: str):
-    character_data = load_character_data()
-    if not character_data:
-        return None  # Cache doesn't exist or is empty
-
-    # Search for the character object by name
-    for character in character_data:
-        if character['base_id'].lower() == character_base_id.lower():
-            return character
-    
-    return None  # Character not found
+    # Returns None if the cache doesn't exist or the character isn't found
+    return character_catalog.by_character_base_id(character_base_id)
 
 
 def is_cache_expired(cache_file, max_age_days=1):
@@ -106,6 +153,7 @@ async def update_all_characters_cache():
                 print("Cache has differences or is missing. Updating...")
                 with open(CACHE_FILE, "w") as f:
                     json.dump(all_data, f, indent=4)
+                character_catalog.replace(all_data)
                 print("Cache updated.")
         except Exception as e:
             print(f"Error updating cache: {e}")
@@ -121,15 +169,5 @@ async def get_valid_all_characters(ctx: discord.AutocompleteContext):
     if cached_data is None:
         await update_all_characters_cache()
     
-    # Load cached data
-    all_data = load_character_data()
-    
-    # Filter names (characters and ships) based on user input
-    filtered_names = [
-        item["name"] for item in all_data if text.lower() in item["name"].lower()
-    ]
-
-    filtered_names = sorted(filtered_names)
-    
-    # Return the first 25 matches or all matches if fewer than 25
-    return filtered_names[:25]
\ No newline at end of file
+    # Return the 25 best ranked names (characters and ships) for the user's input
+    return character_catalog.search(text, 25)
\ No newline at end of file
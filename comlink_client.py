@@ -0,0 +1,78 @@
+import aiohttp
+import asyncio
+import os
+from dotenv import load_dotenv
+from work_scheduler import work_scheduler
+
+# Load environment variables
+load_dotenv()
+
+# Per-request timeouts (seconds) so one slow Comlink reply can't hang a command
+COMLINK_TIMEOUT = float(os.getenv("COMLINK_TIMEOUT", "10"))
+COMLINK_CONNECT_TIMEOUT = float(os.getenv("COMLINK_CONNECT_TIMEOUT", "5"))
+# Size of the keep-alive connection pool shared by every Comlink call
+COMLINK_POOL_SIZE = int(os.getenv("COMLINK_POOL_SIZE", "20"))
+
+class ComlinkClient:
+    def __init__(self, base_url=None, timeout=COMLINK_TIMEOUT, connect_timeout=COMLINK_CONNECT_TIMEOUT, pool_size=COMLINK_POOL_SIZE):
+        self._base_url = base_url
+        self._timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+        self._pool_size = pool_size
+        self._session = None
+
+    @property
+    def base_url(self):
+        return self._base_url or os.getenv("COMLINK_API")
+
+    def _get_session(self):
+        # The session is created lazily so it binds to the running event loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self._pool_size, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self._timeout)
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _post(self, endpoint: str, payload: dict):
+        url = f"{self.base_url}/{endpoint}"
+        try:
+            # Interactive commands get Comlink capacity ahead of the background loops
+            async with work_scheduler.slot(), self._get_session().post(url, json=payload) as response:
+                if response.status != 200:
+                    print(f"Comlink /{endpoint} request failed. Status code: {response.status}")
+                    return None
+                return await response.json(content_type=None)
+        except asyncio.TimeoutError:
+            print(f"Comlink /{endpoint} request timed out")
+        except aiohttp.ClientError as e:
+            print(f"Comlink /{endpoint} request error: {e}")
+        return None
+
+    async def player(self, ally_code: str = None, player_id: str = None, enums: bool = False) -> dict | None:
+        payload = {"allyCode": str(ally_code)} if ally_code is not None else {"playerId": player_id}
+        return await self._post("player", {"payload": payload, "enums": enums})
+
+    async def player_arena(self, ally_code: str, enums: bool = False) -> dict | None:
+        return await self._post("playerArena", {"payload": {"allyCode": str(ally_code)}, "enums": enums})
+
+    async def guild(self, guild_id: str, include_recent_activity: bool = True, enums: bool = False) -> dict | None:
+        payload = {
+            "guildId": guild_id,
+            "includeRecentGuildActivityInfo": include_recent_activity
+        }
+        return await self._post("guild", {"payload": payload, "enums": enums})
+
+    async def get_guilds(self, name: str, start_index: int = 0, count: int = 10, enums: bool = False) -> dict | None:
+        payload = {
+            "filterType": 4,
+            "name": name,
+            "startIndex": start_index,
+            "count": count
+        }
+        return await self._post("getGuilds", {"payload": payload, "enums": enums})
+
+# Shared client used by the bot so every call goes through the same connection pool
+comlink = ComlinkClient()
@@ -0,0 +1,54 @@
+import os
+import time
+import discord
+
+DM_CACHE_TTL = int(os.getenv("DM_CACHE_TTL", str(36 * 3600))) # long enough to carry a DM channel to the next daily reset
+
+class DirectMessageCache:
+    """DM channels by user id, so daily personal messages rarely need the REST API.
+
+    A miss resolves the user from the gateway cache via bot.get_user() and only
+    falls back to fetch_user() when that misses too. The opened DM channel is
+    then kept until the TTL runs out.
+    """
+    def __init__(self, bot, ttl=DM_CACHE_TTL):
+        self.bot = bot
+        self.ttl = ttl
+        self._channels = {}
+
+    def _evict_expired(self, now):
+        for user_id in [user_id for user_id, (_, expires_at) in self._channels.items() if expires_at <= now]:
+            del self._channels[user_id]
+
+    async def get_channel(self, user_id):
+        user_id = int(user_id)
+        now = time.monotonic()
+        cached = self._channels.get(user_id)
+        if cached and cached[1] > now:
+            return cached[0]
+        self._evict_expired(now)
+
+        user = self.bot.get_user(user_id)
+        if user is None:
+            try:
+                user = await self.bot.fetch_user(user_id)
+            except discord.NotFound:
+                print(f"Could not find Discord user {user_id} for a direct message")
+                return None
+        channel = user.dm_channel or await user.create_dm()
+        self._channels[user_id] = (channel, now + self.ttl)
+        return channel
+
+    def discard(self, user_id):
+        self._channels.pop(int(user_id), None)
+
+    async def send(self, user_id, *args, **kwargs):
+        channel = await self.get_channel(user_id)
+        if channel is None:
+            return None
+        try:
+            return await channel.send(*args, **kwargs)
+        except discord.Forbidden:
+            # DMs closed or the bot was blocked; open the channel fresh next time
+            self.discard(user_id)
+            raise
@@ -1,144 +1,168 @@
+import aiohttp
+import asyncio
+import gzip
+import io
 import json
-import requests
 import os
+import threading
+import time
 from dotenv import load_dotenv
+from functools import lru_cache
+from comlink_client import comlink
+from localization_store import LocalizationIndex, compile_localization, read_localization_version
 
 load_dotenv()
-COMLINK_API = os.getenv('COMLINK_API')
 
 LOC_FILE_PATH = 'Loc_ENG_US.txt.json'
+LOC_INDEX_PATH = 'Loc_ENG_US.idx'
 VERSIONS_URL = 'https://raw.githubusercontent.com/swgoh-utils/gamedata/main/allVersions.json'
 LOC_FILE_URL = 'https://raw.githubusercontent.com/swgoh-utils/gamedata/main/Loc_ENG_US.txt.json'
+LOC_VERSION_TTL = 60 * 60 # seconds between localeVersion checks against GitHub
+GEAR_SCRIPT_TEMPLATE = "gear_script_template.js"
+GEAR_SCRIPT_GZIP_BYTES = int(os.getenv('GEAR_SCRIPT_GZIP_BYTES', str(8 * 1024 * 1024))) # gzip larger scripts so they fit Discord's upload limit; 0 disables
+
+# Compiled localization shared by every upload, reopened only when the index file changes
+localization_index = None
+localization_index_mtime = None
+# Compiles are slow and all write the same index file, so only one runs at a time.
+# Everything holding this lock runs on worker threads, never on the event loop.
+localization_lock = threading.Lock()
+
+def ensure_localization_compiled():
+    # Compile once per downloaded loc file (i.e. once per localeVersion)
+    with localization_lock:
+        if os.path.exists(LOC_FILE_PATH) and (not os.path.exists(LOC_INDEX_PATH) or os.path.getmtime(LOC_INDEX_PATH) < os.path.getmtime(LOC_FILE_PATH)):
+            compile_localization(LOC_FILE_PATH, LOC_INDEX_PATH)
+
+def get_localization():
+    global localization_index, localization_index_mtime
+    ensure_localization_compiled()
+
+    with localization_lock:
+        index_mtime = os.path.getmtime(LOC_INDEX_PATH)
+        if localization_index is None or localization_index_mtime != index_mtime:
+            localization_index = LocalizationIndex(LOC_INDEX_PATH)
+            localization_index_mtime = index_mtime
+        return localization_index
 
 def get_local_version():
-    if os.path.exists(LOC_FILE_PATH):
-        with open(LOC_FILE_PATH, 'r', encoding='utf-8') as loc_file:
-            loc_data = json.load(loc_file)
-            return loc_data.get('version', '')
-    return ''
-
-def get_latest_version():
-    response = requests.get(VERSIONS_URL)
-    response.raise_for_status()
-    versions_data = response.json()
-    return versions_data.get('localeVersion', '')
-
-def update_loc_file():
+    # Only reads the compiled index header; never compiles, so it is safe on the event loop
+    return read_localization_version(LOC_INDEX_PATH) or ''
+
+def install_loc_file(download_path):
+    # Compiling validates the structure, and only then is the new file swapped in
+    with localization_lock:
+        compile_localization(download_path, LOC_INDEX_PATH)
+        os.replace(download_path, LOC_FILE_PATH)
+
+async def get_latest_version(session):
+    async with session.get(VERSIONS_URL) as response:
+        response.raise_for_status()
+        versions_data = await response.json(content_type=None)
+        return versions_data.get('localeVersion', '')
+
+async def update_loc_file(session):
     print("Updating Loc_ENG_US.txt.json...")
-    response = requests.get(LOC_FILE_URL)
-    response.raise_for_status()
-    # Attempt to load and validate the JSON content
-    new_data = response.json()
-    if 'version' in new_data and 'data' in new_data:
-        with open(LOC_FILE_PATH, 'wb') as loc_file:
-            loc_file.write(response.content)
-        print("Loc_ENG_US.txt.json updated successfully.")
-    else:
-        print("Downloaded file does not have the expected structure.")
+    download_path = LOC_FILE_PATH + ".download"
+    # Stream the file to disk instead of holding the whole response in memory
+    async with session.get(LOC_FILE_URL) as response:
+        response.raise_for_status()
+        with open(download_path, 'wb') as loc_file:
+            async for chunk in response.content.iter_chunked(64 * 1024):
+                loc_file.write(chunk)
 
-def check_and_update_loc_file():
     try:
-        local_version = get_local_version()
-        latest_version = get_latest_version()
+        await asyncio.to_thread(install_loc_file, download_path)
+        print("Loc_ENG_US.txt.json updated successfully.")
+    except ValueError as e:
+        os.remove(download_path)
+        print(f"Downloaded file does not have the expected structure: {e}")
+
+# When GitHub was last asked for the latest localeVersion, and the background refresh doing it
+loc_version_checked_at = None
+loc_refresh_task = None
+
+async def check_and_update_loc_file(force=False):
+    global loc_version_checked_at
+    # A missing loc file is always fetched, whatever the TTL says
+    if not force and os.path.exists(LOC_FILE_PATH) and loc_version_checked_at is not None and time.monotonic() - loc_version_checked_at < LOC_VERSION_TTL:
+        return
+    loc_version_checked_at = time.monotonic()
 
-        if local_version != latest_version:
-            print(f"Local version ({local_version}) is outdated. Latest version is ({latest_version}).")
-            update_loc_file()
+    try:
+        # A loc file without a current index (e.g. right after a deploy) is compiled off the loop first
+        await asyncio.to_thread(ensure_localization_compiled)
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=300)) as session:
+            local_version = get_local_version()
+            latest_version = await get_latest_version(session)
+
+            if local_version != latest_version:
+                print(f"Local version ({local_version}) is outdated. Latest version is ({latest_version}).")
+                await update_loc_file(session)
     except Exception as e:
         print(f"An error occurred while checking/updating the localization file: {e}")
         print("Proceeding with the current version of Loc_ENG_US.txt.json.")
 
-def create_gear_script(json_data, output_file="gear_script.js", template_file="gear_script_template.js"):
-    # Read the JavaScript template
-    with open(template_file, 'r', encoding='utf-8') as template:
-        js_template = template.read()
-    
-    # Replace the placeholder with the JSON data
-    json_string = json.dumps(json_data, indent=4)
-    js_script = js_template.replace("{{GEAR_DATA_PLACEHOLDER}}", json_string)
-    
-    # Write the final script to the output file
-    with open(output_file, 'w', encoding='utf-8') as output:
-        output.write(js_script)
-    
-    print(f"Generated script saved to {output_file}")
-
-def parse_inventory_file(inventory_file_path):
-    check_and_update_loc_file()
-
-    with open(inventory_file_path, 'r', encoding='utf-8') as inv_file:
-        inventory_data = json.load(inv_file)
-
-    with open(LOC_FILE_PATH, 'r', encoding='utf-8') as loc_file:
-        localization_data = json.load(loc_file)
-
-    # Extract relevant sections
-    equipment = inventory_data['inventory']['equipment']
-    materials = inventory_data['inventory']['material']
-    ally_code = inventory_data['allyCode']
-    localization = localization_data['data']
-    
-    # Prepare the output
-    # Prepare filenames with ally code
-    output_file = f'{ally_code}_inventory_output.csv'
-    json_output_file = f'{ally_code}_inventory_output.json'
-    gear_import_file = f'{ally_code}_gear_script.js'
-    output_lines = []
-    json_data = []
-
-    output_lines.append('"Item Name", "Quantity"')
-
-    def fetch_player_data(ally_code):
-        url = COMLINK_API + "/player" # ComLink URL
-        payload = {
-            "payload": {
-                "allyCode": ally_code
-            }
-        }
-        response = requests.post(url, json=payload)
-        return response.json()
-
-    def parse_definition_id(definition_id):
-        unit, star = definition_id.split(':')
-        star_value = {
-            'ONE_STAR': 1,
-            'TWO_STAR': 2,
-            'THREE_STAR': 3,
-            'FOUR_STAR': 4,
-            'FIVE_STAR': 5,
-            'SIX_STAR': 6,
-            'SEVEN_STAR': 7
-        }.get(star, 0)
-        return unit, star_value
-
-    player_data = fetch_player_data(str(ally_code))
-    roster_units = player_data['rosterUnit']
-
-    unit_stars = {}
-    for unit in roster_units:
-        unit_id, star_value = parse_definition_id(unit['definitionId'])
-        unit_stars[unit_id] = star_value
+def refresh_loc_file_in_background():
+    # Never make an upload wait on GitHub; at most one refresh runs at a time
+    global loc_refresh_task
+    if loc_refresh_task is None or loc_refresh_task.done():
+        loc_refresh_task = asyncio.create_task(check_and_update_loc_file())
+    return loc_refresh_task
 
+@lru_cache
+def load_gear_script_template(template_file=GEAR_SCRIPT_TEMPLATE):
+    # Read the JavaScript template once and split it around the placeholder
+    with open(template_file, 'r', encoding='utf-8') as template:
+        prefix, suffix = template.read().split("{{GEAR_DATA_PLACEHOLDER}}", 1)
+    return prefix, suffix
+
+class GearScriptWriter:
+    """Builds the gear import script in memory, one gear record at a time."""
+    def __init__(self, template_file=GEAR_SCRIPT_TEMPLATE):
+        self._prefix, self._suffix = load_gear_script_template(template_file)
+        self._buffer = io.StringIO()
+        self._buffer.write(self._prefix)
+        self._buffer.write("[")
+        self._count = 0
+
+    def add(self, record):
+        # Compact JSON: the script is pasted into a console, nobody reads the indentation
+        if self._count:
+            self._buffer.write(",")
+        self._buffer.write(json.dumps(record, separators=(",", ":")))
+        self._count += 1
+
+    def getvalue(self) -> bytes:
+        self._buffer.write("]")
+        self._buffer.write(self._suffix)
+        return self._buffer.getvalue().encode('utf-8')
+
+def parse_definition_id(definition_id):
+    unit, star = definition_id.split(':')
+    star_value = {
+        'ONE_STAR': 1,
+        'TWO_STAR': 2,
+        'THREE_STAR': 3,
+        'FOUR_STAR': 4,
+        'FIVE_STAR': 5,
+        'SIX_STAR': 6,
+        'SEVEN_STAR': 7
+    }.get(star, 0)
+    return unit, star_value
+
+def iter_equipment(equipment, localization):
     for item in equipment:
         item_id = item['id']
         quantity = item['quantity']
         loc_key = f"EQUIPMENT_{item_id}_NAME".upper()  # Ensure the lookup key is uppercase
 
-            # Handle cases where _V2 is part of the loc_key
+        # Handle cases where _V2 is part of the loc_key
         if "_V2" in loc_key:
             loc_key = loc_key.replace("_V2", "") + "_V2"
-        item_name = localization.get(loc_key, loc_key)
-        
-        # Format the output line
-        output_line = f"\"{item_name}\", \"{quantity}\""
-        output_lines.append(output_line)
-
-        json_data.append({
-                "item_name": item_name,
-                "quantity": quantity
-            })
+        yield localization.get(loc_key, loc_key), quantity
 
-    # Process materials
+def iter_materials(materials, localization, unit_stars):
     for item in materials:
         item_id = item['id']
         quantity = item['quantity']
@@ -147,43 +171,82 @@ def parse_inventory_file(inventory_file_path):
             unit_key = item_id.split('_', 1)[1]
             loc_key = f"UNIT_{unit_key}_NAME".upper()
             star_count = unit_stars.get(unit_key, 0)
-            item_name = localization.get(loc_key, loc_key)
-            output_line = f"\"{item_name}\", \"{star_count};{quantity}\""
-            # json_data.append({
-            #     "item_name": item_name,
-            #     "star_count": star_count,
-            #     "quantity": quantity
-            # })
+            yield localization.get(loc_key, loc_key), f"{star_count};{quantity}"
         else:
             loc_key = f"{item_id}_NAME"
-            item_name = localization.get(loc_key, loc_key)
-            output_line = f"\"{item_name}\", \"{quantity}\""
-            # json_data.append({
-            #     "item_name": item_name,
-            #     "quantity": quantity
-            # })
+            yield localization.get(loc_key, loc_key), quantity
 
-        # Format the output line
-        output_lines.append(output_line)
+def build_inventory_outputs(inventory_data, unit_stars):
+    # Extract relevant sections
+    equipment = inventory_data['inventory']['equipment']
+    materials = inventory_data['inventory']['material']
+    ally_code = inventory_data['allyCode']
+    localization = get_localization()
 
-    # Write the output lines to a file
-    with open(output_file, 'w', encoding='utf-8') as out_file:
-        for line in output_lines:
-            out_file.write(line + '\n')
+    # Rows go straight into in-memory buffers as they are produced
+    csv_buffer = io.StringIO()
+    csv_buffer.write('"Item Name", "Quantity"\n')
+    gear_script = GearScriptWriter()
 
-    # Write the JSON data to a file
-    with open(json_output_file, 'w', encoding='utf-8') as json_file:
-        json.dump(json_data, json_file, indent=4, ensure_ascii=False)
+    for item_name, quantity in iter_equipment(equipment, localization):
+        csv_buffer.write(f"\"{item_name}\", \"{quantity}\"\n")
+        gear_script.add({
+            "item_name": item_name,
+            "quantity": quantity
+        })
 
-    # print(f"Output written to {output_file}")
-    # print(f"Json Output written to {json_output_file}")
+    # Process materials
+    for item_name, quantity in iter_materials(materials, localization, unit_stars):
+        csv_buffer.write(f"\"{item_name}\", \"{quantity}\"\n")
+
+    csv_file = (f'{ally_code}_inventory_output.csv', io.BytesIO(csv_buffer.getvalue().encode('utf-8')))
+
+    gear_script_filename = f'{ally_code}_gear_script.js'
+    gear_script_bytes = gear_script.getvalue()
+    if GEAR_SCRIPT_GZIP_BYTES and len(gear_script_bytes) > GEAR_SCRIPT_GZIP_BYTES:
+        gear_script_filename += '.gz'
+        gear_script_bytes = gzip.compress(gear_script_bytes)
+    gear_script_file = (gear_script_filename, io.BytesIO(gear_script_bytes))
+    return csv_file, gear_script_file
+
+async def parse_inventory_file(inventory_bytes: bytes):
+    """Parse an uploaded inventory.json into a CSV and a gear import script.
+
+    Returns ((csv filename, csv buffer), (script filename, script buffer)) ready for discord.File.
+    The JSON decode and the formatting run on worker threads so the event loop stays free.
+    """
+    loc_refresh = refresh_loc_file_in_background()
+    if not os.path.exists(LOC_FILE_PATH):
+        # Nothing to fall back on yet, so the first uploads wait on the one shared download.
+        # Shielded so a cancelled upload doesn't cancel the download for everyone else.
+        await asyncio.shield(loc_refresh)
+
+    inventory_data = await asyncio.to_thread(json.loads, inventory_bytes)
+    ally_code = inventory_data['allyCode']
 
-    create_gear_script(json_data, gear_import_file)
+    player_data = await comlink.player(str(ally_code))
+    roster_units = player_data.get('rosterUnit', []) if player_data else []
 
-    return output_file, gear_import_file
+    unit_stars = {}
+    for unit in roster_units:
+        unit_id, star_value = parse_definition_id(unit['definitionId'])
+        unit_stars[unit_id] = star_value
+
+    return await asyncio.to_thread(build_inventory_outputs, inventory_data, unit_stars)
 
 # Example usage if run as a standalone script
 if __name__ == "__main__":
     import sys
-    inventory_file_path = sys.argv[1]
-    parse_inventory_file(inventory_file_path)
\ No newline at end of file
+
+    async def main():
+        try:
+            with open(sys.argv[1], 'rb') as inv_file:
+                outputs = await parse_inventory_file(inv_file.read())
+            for filename, buffer in outputs:
+                with open(filename, 'wb') as output:
+                    output.write(buffer.getvalue())
+                print(f"Output written to {filename}")
+        finally:
+            await comlink.close()
+
+    asyncio.run(main())
\ No newline at end of file
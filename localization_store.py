@@ -0,0 +1,106 @@
+import json
+import mmap
+import os
+import struct
+
+# Compiled layout:
+#   header   MAGIC, uint32 version length, version bytes, uint32 entry count
+#   table    one (key offset, key length, value offset, value length) uint32 record per key, sorted by key
+#   blob     utf-8 keys and values, offsets relative to the start of the blob
+MAGIC = b"R2LOC001"
+HEADER = struct.Struct("<I")
+ENTRY = struct.Struct("<IIII")
+
+def compile_localization(loc_file_path, index_path):
+    """Parse the full localization JSON once and write the compiled, sorted index next to it."""
+    with open(loc_file_path, 'r', encoding='utf-8') as loc_file:
+        loc_data = json.load(loc_file)
+    if 'version' not in loc_data or 'data' not in loc_data:
+        raise ValueError(f"{loc_file_path} does not have the expected structure")
+
+    version = str(loc_data.get('version', '')).encode('utf-8')
+    entries = sorted((key.encode('utf-8'), str(value).encode('utf-8')) for key, value in loc_data.get('data', {}).items())
+
+    table = bytearray()
+    blob = bytearray()
+    for key, value in entries:
+        key_offset = len(blob)
+        blob += key
+        value_offset = len(blob)
+        blob += value
+        table += ENTRY.pack(key_offset, len(key), value_offset, len(value))
+
+    temp_path = index_path + ".tmp"
+    with open(temp_path, 'wb') as index_file:
+        index_file.write(MAGIC)
+        index_file.write(HEADER.pack(len(version)))
+        index_file.write(version)
+        index_file.write(HEADER.pack(len(entries)))
+        index_file.write(table)
+        index_file.write(blob)
+    # Swap in atomically; readers that still have the old file mapped keep working
+    os.replace(temp_path, index_path)
+    print(f"Compiled {len(entries)} localization strings for version {version.decode('utf-8')}")
+
+def read_localization_version(index_path):
+    """Read just the version from a compiled index header, or None if there is no valid index."""
+    try:
+        with open(index_path, 'rb') as index_file:
+            header = index_file.read(len(MAGIC) + HEADER.size)
+            if len(header) < len(MAGIC) + HEADER.size or header[:len(MAGIC)] != MAGIC:
+                return None
+            (version_length,) = HEADER.unpack_from(header, len(MAGIC))
+            return index_file.read(version_length).decode('utf-8')
+    except OSError:
+        return None
+
+class LocalizationIndex:
+    """Read-only, memory-mapped view of a compiled localization file.
+
+    Lookups binary search the sorted key table, so nothing is parsed up front and
+    no per-upload copy of the strings is made.
+    """
+    def __init__(self, index_path):
+        with open(index_path, 'rb') as index_file:
+            self._map = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            self._map.close()
+            raise ValueError(f"{index_path} is not a compiled localization file")
+
+        position = len(MAGIC)
+        (version_length,) = HEADER.unpack_from(self._map, position)
+        position += HEADER.size
+        self.version = self._map[position:position + version_length].decode('utf-8')
+        position += version_length
+        (self._count,) = HEADER.unpack_from(self._map, position)
+        self._table_start = position + HEADER.size
+        self._blob_start = self._table_start + self._count * ENTRY.size
+
+    def __len__(self):
+        return self._count
+
+    def _entry(self, index):
+        return ENTRY.unpack_from(self._map, self._table_start + index * ENTRY.size)
+
+    def _key(self, key_offset, key_length):
+        start = self._blob_start + key_offset
+        return self._map[start:start + key_length]
+
+    def get(self, key, default=None):
+        target = key.encode('utf-8')
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            key_offset, key_length, value_offset, value_length = self._entry(middle)
+            current = self._key(key_offset, key_length)
+            if current < target:
+                low = middle + 1
+            elif current > target:
+                high = middle
+            else:
+                start = self._blob_start + value_offset
+                return self._map[start:start + value_length].decode('utf-8')
+        return default
+
+    def close(self):
+        self._map.close()
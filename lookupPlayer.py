@@ -1,26 +1,11 @@
-import requests
+import asyncio
 import sys
-import os
-from dotenv import load_dotenv
+from comlink_client import comlink
 
-# Load environment variables
-load_dotenv()
-
-def get_guild_info(guild_name):
-    url = f'{os.getenv("COMLINK_API")}/getGuilds'
-    payload = {
-        "payload": {
-            "filterType": 4,
-            "name": guild_name,
-            "startIndex": 0,
-            "count": 10
-        },
-        "enums": False
-    }
-
-    response = requests.post(url, json=payload)
-    if response.status_code == 200:
-        guild_data = response.json().get('guild', [])
+async def get_guild_info(guild_name):
+    response = await comlink.get_guilds(guild_name)
+    if response is not None:
+        guild_data = response.get('guild', [])
         for guild in guild_data:
             if guild.get('name') == guild_name:
                 member_count = guild.get('memberCount', 0)
@@ -29,49 +14,31 @@ def get_guild_info(guild_name):
         print("Guild not found.")
         return None, None, None
     else:
-        print("Failed to fetch guild. Status code:", response.status_code)
+        print("Failed to fetch guild.")
         return None, None, None
 
-def get_player_id_from_guild(guild_id, player_name):
-    url = f'{os.getenv("COMLINK_API")}/guild'
-    payload = {
-        "payload": {
-            "guildId": guild_id,
-            "includeRecentGuildActivityInfo": True
-        },
-        "enums": False
-    }
-
-    response = requests.post(url, json=payload)
-    if response.status_code == 200:
-        guild_members = response.json().get('guild', {}).get('member', [])
+async def get_player_id_from_guild(guild_id, player_name):
+    response = await comlink.guild(guild_id)
+    if response is not None:
+        guild_members = response.get('guild', {}).get('member', [])
         for member in guild_members:
             if member['playerName'] == player_name:
                 return member['playerId']
         print("Player not found in the guild.")
         return None
     else:
-        print("Failed to fetch guild members. Status code:", response.status_code)
+        print("Failed to fetch guild members.")
         return None
 
-def get_player_ally_code_by_id(player_id):
-    url = f'{os.getenv("COMLINK_API")}/player'
-    payload = {
-        "payload": {
-            "playerId": player_id
-        },
-        "enums": False
-    }
-
-    response = requests.post(url, json=payload)
-    if response.status_code == 200:
-        player_data = response.json()
+async def get_player_ally_code_by_id(player_id):
+    player_data = await comlink.player(player_id=player_id)
+    if player_data is not None:
         return player_data.get('allyCode')
     else:
-        print("Failed to fetch player details. Status code:", response.status_code)
+        print("Failed to fetch player details.")
         return None
 
-def main():
+async def main():
     if len(sys.argv) != 3:
         print("Usage: python script.py [guild_name] [player_name]")
         return
@@ -79,15 +46,18 @@ def main():
     guild_name = sys.argv[1]
     player_name = sys.argv[2]
 
-    guild_id, _, _ = get_guild_info(guild_name) #  member_count, shceduled_raid_offset
-    if guild_id:
-        player_id = get_player_id_from_guild(guild_id, player_name)
-        if player_id:
-            ally_code = get_player_ally_code_by_id(player_id)
-            if ally_code:
-                print(f"Ally code for player {player_name}: {ally_code}")
-        else:
-            print("Failed to retrieve player's ally code.")
+    try:
+        guild_id, _, _ = await get_guild_info(guild_name) #  member_count, shceduled_raid_offset
+        if guild_id:
+            player_id = await get_player_id_from_guild(guild_id, player_name)
+            if player_id:
+                ally_code = await get_player_ally_code_by_id(player_id)
+                if ally_code:
+                    print(f"Ally code for player {player_name}: {ally_code}")
+            else:
+                print("Failed to retrieve player's ally code.")
+    finally:
+        await comlink.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from png_generator import render_mod_card
+
+MOD_CARD_CACHE_DIR = "mod_card_cache"
+MOD_CARD_MEMORY_ITEMS = 64 # rendered cards kept in memory before falling back to disk
+
+class ModCardCache:
+    """Content-addressed cache of rendered /mods cards.
+
+    Cards are keyed by a hash of the character's full mod recommendation, so a
+    changed recommendation simply gets a new key. PNG bytes live in an LRU memory
+    tier backed by one file per key on disk.
+    """
+    def __init__(self, cache_dir=MOD_CARD_CACHE_DIR, max_items=MOD_CARD_MEMORY_ITEMS):
+        self.cache_dir = cache_dir
+        self.max_items = max_items
+        self._memory = OrderedDict()
+        # Renders run on worker threads, so guard the LRU bookkeeping
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(mod_info):
+        recommendation = json.dumps(mod_info, sort_keys=True)
+        return hashlib.sha256(recommendation.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.png")
+
+    def _remember(self, key, png_bytes):
+        with self._lock:
+            self._memory[key] = png_bytes
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_items:
+                self._memory.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        try:
+            with open(self._path(key), "rb") as card_file:
+                png_bytes = card_file.read()
+        except OSError:
+            return None
+        self._remember(key, png_bytes)
+        return png_bytes
+
+    def put(self, key, png_bytes):
+        self._remember(key, png_bytes)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write to a temp file first so a concurrent reader never sees a partial PNG
+            temp_path = self._path(key) + ".tmp"
+            with open(temp_path, "wb") as card_file:
+                card_file.write(png_bytes)
+            os.replace(temp_path, self._path(key))
+        except OSError as e:
+            print(f"Could not write mod card cache file for {key}: {e}")
+
+    def get_or_render(self, mod_info):
+        key = self.key(mod_info)
+        png_bytes = self.get(key)
+        if png_bytes is None:
+            png_bytes = render_mod_card(mod_info)
+            self.put(key, png_bytes)
+        return png_bytes
+
+    def discard(self, key):
+        with self._lock:
+            self._memory.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def retain(self, mod_data):
+        # Drop every card whose recommendation is no longer in the current mod data
+        valid_keys = {self.key(mod_info) for mod_info in mod_data}
+        with self._lock:
+            for key in [key for key in self._memory if key not in valid_keys]:
+                del self._memory[key]
+        if not os.path.isdir(self.cache_dir):
+            return
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith(".png") and filename[:-4] not in valid_keys:
+                try:
+                    os.remove(os.path.join(self.cache_dir, filename))
+                except OSError as e:
+                    print(f"Could not remove stale mod card {filename}: {e}")
+
+mod_card_cache = ModCardCache()
@@ -0,0 +1,204 @@
+import asyncio
+import json
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS guilds (
+    guild_id TEXT PRIMARY KEY,
+    settings TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS personal_subscriptions (
+    user_id TEXT PRIMARY KEY,
+    settings TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    ally_code TEXT,
+    settings TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS users_by_ally_code ON users (ally_code);
+CREATE TABLE IF NOT EXISTS opponents (
+    tracker_user_id TEXT NOT NULL,
+    arena_type TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    ally_code TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (tracker_user_id, arena_type, position)
+);
+CREATE INDEX IF NOT EXISTS opponents_by_ally_code ON opponents (ally_code);
+CREATE TABLE IF NOT EXISTS channels (
+    channel_id INTEGER PRIMARY KEY
+);
+"""
+
+ARENA_TYPES = ("fleetarena", "squadarena")
+
+class SqliteStateStore:
+    """The bot's registration and tracking state, kept in memory and backed by SQLite.
+
+    The bot keeps mutating the plain dicts/list it always used. Callers mark the
+    changed row with mark_dirty(table, key), and flush() writes only those rows
+    in one transaction, instead of rewriting whole documents.
+    """
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        self._dirty = {"guilds": set(), "personal_subscriptions": set(), "users": set(), "channels": set()}
+        self._write = None # the background write in progress, if any
+        self._load()
+
+    def _load(self):
+        rows = self._connection.execute("SELECT guild_id, settings FROM guilds")
+        self.guild_reset_times = {guild_id: json.loads(settings) for guild_id, settings in rows}
+
+        rows = self._connection.execute("SELECT user_id, settings FROM personal_subscriptions")
+        self.personal_reset_times = {user_id: json.loads(settings) for user_id, settings in rows}
+
+        # rowid order is registration order, which the ally code index relies on
+        rows = self._connection.execute("SELECT user_id, settings FROM users ORDER BY rowid")
+        self.ally_code_tracking = {user_id: json.loads(settings) for user_id, settings in rows}
+        for user_info in self.ally_code_tracking.values():
+            for arena_type in ARENA_TYPES:
+                if isinstance(user_info.get(arena_type), dict):
+                    user_info[arena_type]["opponent_rank_tracking"] = []
+        rows = self._connection.execute("SELECT tracker_user_id, arena_type, data FROM opponents ORDER BY tracker_user_id, arena_type, position")
+        for tracker_user_id, arena_type, data in rows:
+            arena_info = self.ally_code_tracking.get(tracker_user_id, {}).get(arena_type)
+            if isinstance(arena_info, dict):
+                arena_info["opponent_rank_tracking"].append(json.loads(data))
+
+        self.channels = [channel_id for (channel_id,) in self._connection.execute("SELECT channel_id FROM channels ORDER BY rowid")]
+
+    def migrate_from_json(self, guild_file, personal_file, ally_code_file, channels_file):
+        # One-time import of the JSON documents the bot used before SQLite
+        if self._connection.execute("SELECT value FROM meta WHERE key = 'json_migrated'").fetchone():
+            return
+
+        def read(path, default):
+            try:
+                with open(path, "r") as file:
+                    return json.load(file)
+            except FileNotFoundError:
+                return default
+
+        self.guild_reset_times.update(read(guild_file, {}))
+        self.personal_reset_times.update(read(personal_file, {}))
+        self.ally_code_tracking.update(read(ally_code_file, {}))
+        self.channels.extend(channel_id for channel_id in read(channels_file, []) if channel_id not in self.channels)
+
+        self._dirty["guilds"].update(self.guild_reset_times)
+        self._dirty["personal_subscriptions"].update(self.personal_reset_times)
+        self._dirty["channels"].update(self.channels)
+        statements, _ = self._take_dirty()
+        # Users go in dict order so their rowids keep the JSON file's registration order
+        for user_id in self.ally_code_tracking:
+            statements.extend(self._user_statements(user_id))
+        statements.append(("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', '1')", ()))
+        self._execute(statements)
+        print(f"Migrated JSON state into {self.db_path}")
+
+    def mark_dirty(self, table, key):
+        self._dirty[table].add(key)
+
+    def _restore_dirty(self, taken):
+        # A failed write leaves its rows dirty so the next flush tries them again
+        for table, keys in taken.items():
+            self._dirty[table].update(keys)
+
+    def _user_statements(self, user_id):
+        statements = [("DELETE FROM opponents WHERE tracker_user_id = ?", (user_id,))]
+        user_info = self.ally_code_tracking.get(user_id)
+        if user_info is None:
+            statements.append(("DELETE FROM users WHERE user_id = ?", (user_id,)))
+            return statements
+
+        # Opponents live in their own table; the user row keeps everything else
+        settings = dict(user_info)
+        for arena_type in ARENA_TYPES:
+            if isinstance(settings.get(arena_type), dict):
+                arena_info = dict(settings[arena_type])
+                for position, opponent in enumerate(arena_info.pop("opponent_rank_tracking", [])):
+                    statements.append((
+                        "INSERT INTO opponents (tracker_user_id, arena_type, position, ally_code, data) VALUES (?, ?, ?, ?, ?)",
+                        (user_id, arena_type, position, opponent.get("ally_code"), json.dumps(opponent))
+                    ))
+                settings[arena_type] = arena_info
+        # Upsert rather than REPLACE so the row keeps its rowid (registration order)
+        statements.append((
+            "INSERT INTO users (user_id, ally_code, settings) VALUES (?, ?, ?) "
+            "ON CONFLICT (user_id) DO UPDATE SET ally_code = excluded.ally_code, settings = excluded.settings",
+            (user_id, settings.get("ally_code"), json.dumps(settings))
+        ))
+        return statements
+
+    def _settings_statement(self, table, key_column, data, key):
+        if key not in data:
+            return (f"DELETE FROM {table} WHERE {key_column} = ?", (key,))
+        return (f"INSERT OR REPLACE INTO {table} ({key_column}, settings) VALUES (?, ?)", (key, json.dumps(data[key])))
+
+    def _take_dirty(self):
+        # Serialize on the calling thread so nobody mutates the data mid-dump
+        statements = []
+        for guild_id in self._dirty["guilds"]:
+            statements.append(self._settings_statement("guilds", "guild_id", self.guild_reset_times, guild_id))
+        for user_id in self._dirty["personal_subscriptions"]:
+            statements.append(self._settings_statement("personal_subscriptions", "user_id", self.personal_reset_times, user_id))
+        for user_id in self._dirty["users"]:
+            statements.extend(self._user_statements(user_id))
+        for channel_id in self._dirty["channels"]:
+            if channel_id in self.channels:
+                statements.append(("INSERT OR IGNORE INTO channels (channel_id) VALUES (?)", (channel_id,)))
+            else:
+                statements.append(("DELETE FROM channels WHERE channel_id = ?", (channel_id,)))
+        taken = {table: set(keys) for table, keys in self._dirty.items()}
+        for keys in self._dirty.values():
+            keys.clear()
+        return statements, taken
+
+    def _execute(self, statements):
+        with self._lock, self._connection:
+            for sql, parameters in statements:
+                self._connection.execute(sql, parameters)
+
+    def _write_done(self, write, taken):
+        if not write.cancelled() and write.exception() is not None:
+            print(f"Error saving state to {self.db_path}: {write.exception()}")
+            self._restore_dirty(taken)
+
+    async def flush(self):
+        statements, taken = self._take_dirty()
+        if statements:
+            self._write = asyncio.ensure_future(asyncio.to_thread(self._execute, statements))
+            self._write.add_done_callback(lambda write: self._write_done(write, taken))
+            try:
+                # Shielded so cancelling the flush loop never abandons a write halfway
+                await asyncio.shield(self._write)
+            except sqlite3.Error:
+                pass # reported and re-marked dirty by _write_done
+
+    async def wait_for_writes(self):
+        if self._write is not None:
+            await asyncio.gather(self._write, return_exceptions=True)
+
+    def flush_now(self):
+        # Blocking flush for shutdown
+        statements, taken = self._take_dirty()
+        if statements:
+            try:
+                self._execute(statements)
+            except sqlite3.Error as e:
+                print(f"Error saving state to {self.db_path}: {e}")
+                self._restore_dirty(taken)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
@@ -1,12 +1,59 @@
 from PIL import Image, ImageDraw, ImageFont
-import requests
 from io import BytesIO
+import glob
 import os
-
-def download_image(url):
-    response = requests.get(url)
-    response.raise_for_status()  # Raise an exception for HTTP errors
-    return Image.open(BytesIO(response.content))
+from portrait_cache import portrait_cache
+
+MOD_IMAGES_DIR = 'mod_images'
+FONT_PATH = "arial.ttf"
+MOD_ICON_SIZE = 120
+
+class RenderAssets:
+    """Fonts and pre-resized mod icons shared by every render.
+
+    Everything is loaded once. The images handed out are shared, so callers
+    must only read from them (paste them onto a new image), never draw on them.
+    """
+    def __init__(self, image_dir=MOD_IMAGES_DIR, font_path=FONT_PATH, icon_size=MOD_ICON_SIZE):
+        self.image_dir = image_dir
+        self.font_path = font_path
+        self.icon_size = icon_size
+        self._fonts = {}
+        self._icons = None
+        self._footer_backgrounds = {}
+
+    def font(self, size):
+        if size not in self._fonts:
+            try:
+                self._fonts[size] = ImageFont.truetype(self.font_path, size)
+            except IOError:
+                self._fonts[size] = ImageFont.load_default()
+        return self._fonts[size]
+
+    def preload(self):
+        # Load the fonts and resize every Mod-*.png icon to its render size up front
+        if self._icons is not None:
+            return
+        for size in (48, 24, 16):
+            self.font(size)
+        icons = {}
+        for icon_path in glob.glob(os.path.join(self.image_dir, 'Mod-*.png')):
+            with Image.open(icon_path) as icon_img:
+                icons[os.path.basename(icon_path)] = icon_img.resize((self.icon_size, self.icon_size))
+        self._icons = icons
+        print(f"Preloaded {len(icons)} mod icons")
+
+    def icon(self, filename):
+        # Returns None if the icon does not exist in mod_images
+        self.preload()
+        return self._icons.get(filename)
+
+    def footer_background(self, width, height):
+        if (width, height) not in self._footer_backgrounds:
+            self._footer_backgrounds[(width, height)] = Image.new("RGBA", (width, height), "grey")
+        return self._footer_backgrounds[(width, height)]
+
+render_assets = RenderAssets()
 
 def get_centered_x(draw, text, font, image_width):
     text_length = draw.textlength(text, font=font)
@@ -21,16 +68,10 @@ def create_image_with_mods(output_path, character_name, character_url, mod_data,
     image = Image.new('RGB', (width, height), background_color)
     draw = ImageDraw.Draw(image)
 
-    # Load fonts
-    try:
-        font_path = "arial.ttf"
-        font_large = ImageFont.truetype(font_path, 48)  # Larger font for character name
-        font_medium = ImageFont.truetype(font_path, 24)  # Medium font for mod names
-        font_small = ImageFont.truetype(font_path, 16) # Small font for footer
-    except IOError:
-        font_large = ImageFont.load_default()
-        font_medium = ImageFont.load_default()
-        font_small = ImageFont.load_default()
+    # Load fonts (cached after the first render)
+    font_large = render_assets.font(48)  # Larger font for character name
+    font_medium = render_assets.font(24)  # Medium font for mod names
+    font_small = render_assets.font(16) # Small font for footer
 
     # Add character name
     text_color = (255, 255, 255)
@@ -48,8 +89,7 @@ def create_image_with_mods(output_path, character_name, character_url, mod_data,
         draw.text((centered_x, text_y), character_name, font=font, fill=text_color)
     
     # Add character picture on the left side
-    character_img = download_image(character_url)
-    character_img = character_img.resize((200, 200)).convert("RGBA")  # Resize to fit nicely
+    character_img = portrait_cache.get(character_url)  # Cached as a 200x200 RGBA image
     # Calculate image position (centered horizontally below the text)
     image_x = width / 2 - character_img.width / 2
     image_y = 115
@@ -65,13 +105,12 @@ def create_image_with_mods(output_path, character_name, character_url, mod_data,
     mod_set_icons = []
     for mod_set_type in mod_set_types:
         mod_set_type_formated = mod_set_type.replace(" ", "_")
-        mod_set_image_path = os.path.join('mod_images', f'Mod-{mod_set_type_formated}-Transmitter-E.png')  # Updated filename
-        if os.path.exists(mod_set_image_path):
-            mod_set_img = Image.open(mod_set_image_path)
-            mod_set_img = mod_set_img.resize((120, 120))  # Resize to 120px
+        mod_set_image_name = f'Mod-{mod_set_type_formated}-Transmitter-E.png'  # Updated filename
+        mod_set_img = render_assets.icon(mod_set_image_name)  # Already resized to 120px
+        if mod_set_img is not None:
             mod_set_icons.append((mod_set_img, mod_set_type))
         else:
-            print(f"Mod set image not found: {mod_set_image_path}")
+            print(f"Mod set image not found: {os.path.join(MOD_IMAGES_DIR, mod_set_image_name)}")
 
     # Space for mod sets
     mod_set_y_start = 350  # Adjusted to move mod sets down
@@ -96,7 +135,7 @@ def create_image_with_mods(output_path, character_name, character_url, mod_data,
     }
 
     # Positions and layout configuration
-    icon_size = 120
+    icon_size = MOD_ICON_SIZE
     spacing = 200
     row_height = 150
     start_y = 550
@@ -114,10 +153,8 @@ def create_image_with_mods(output_path, character_name, character_url, mod_data,
         for col_index, mod_type in enumerate(row):
             icon_filename = mod_icons.get(mod_type)
             if icon_filename:
-                icon_path = os.path.join('mod_images', icon_filename)
-                if os.path.exists(icon_path):
-                    icon_img = Image.open(icon_path)
-                    icon_img = icon_img.resize((icon_size, icon_size))  # Resize icons if needed
+                icon_img = render_assets.icon(icon_filename)  # Pre-resized to icon_size
+                if icon_img is not None:
                     x_position = start_x_row + col_index * (icon_size + spacing)
                     image.paste(icon_img, (x_position, y_position), icon_img)
 
@@ -156,16 +193,23 @@ def create_image_with_mods(output_path, character_name, character_url, mod_data,
 
     
     # Draw footer background
-    footer_background = Image.new("RGBA", (width, footer_y), "grey")
+    footer_background = render_assets.footer_background(width, footer_y)
     image.paste(footer_background, (0, footer_y-font_small.size), footer_background)
 
     if footer_x is not None:
         draw.text((footer_x, footer_y), footer_text, font=font_small, fill="white")
-    # Save the final image
-    image.save(output_path)
-
-# Example data
-example = {
+    # Save the final image (output_path may also be a file-like object)
+    image.save(output_path, format="PNG")
+
+def render_mod_card(mod_info):
+    # Render a mod recommendation card straight to PNG bytes without touching disk
+    buffer = BytesIO()
+    create_image_with_mods(buffer, mod_info["character_name"], mod_info["portrait_url"], mod_info["recommended_stats"], mod_info["mod_sets"])
+    return buffer.getvalue()
+
+if __name__ == "__main__":
+    # Example data
+    example = {
         "character_name": "Greedo",
         "portrait_url": "https://game-assets.swgoh.gg/textures/tex.charui_greedo.png",
         "best_mods_url": "https://swgoh.gg/units/greedo/best-mods/",
@@ -179,17 +223,17 @@ example = {
             "circle": "Protection",
             "cross": "Potency / Protection"
         }
-}
-
-# character_name = "Supreme Leader Kylo Ren"
-# character_url = "https://game-assets.swgoh.gg/textures/tex.charui_kyloren_tros.png"
-# mod_data = {
-#     "arrow": "Speed",
-#     "triangle": "Critical Damage",
-#     "circle": "Health",
-#     "cross": "Health"
-# }
-# mod_set_types = ["Offense", "Critical Chance"]  # Example mod set types
-
-# Create the image
-create_image_with_mods("output_image.png", example["character_name"], example["portrait_url"], example["recommended_stats"], example["mod_sets"])
+    }
+
+    # character_name = "Supreme Leader Kylo Ren"
+    # character_url = "https://game-assets.swgoh.gg/textures/tex.charui_kyloren_tros.png"
+    # mod_data = {
+    #     "arrow": "Speed",
+    #     "triangle": "Critical Damage",
+    #     "circle": "Health",
+    #     "cross": "Health"
+    # }
+    # mod_set_types = ["Offense", "Critical Chance"]  # Example mod set types
+
+    # Create the image
+    create_image_with_mods("output_image.png", example["character_name"], example["portrait_url"], example["recommended_stats"], example["mod_sets"])
\ No newline at end of file
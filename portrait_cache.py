@@ -0,0 +1,124 @@
+import aiohttp
+import asyncio
+import hashlib
+import json
+import os
+import time
+from io import BytesIO
+from PIL import Image
+import requests
+
+PORTRAIT_CACHE_DIR = "portrait_cache"
+PORTRAIT_SIZE = (200, 200)
+PORTRAIT_REVALIDATE_SECONDS = 24 * 3600 # how long a portrait is trusted before asking the server again
+PORTRAIT_FETCH_CONCURRENCY = 8
+
+def decode_portrait(content: bytes):
+    # Decode and resize once so renders can paste the portrait as-is
+    with Image.open(BytesIO(content)) as portrait:
+        return portrait.resize(PORTRAIT_SIZE).convert("RGBA")
+
+class PortraitCache:
+    """Character portraits keyed by URL, stored decoded and resized in memory and on disk.
+
+    Each portrait keeps its ETag/Last-Modified so refresh() can revalidate with
+    conditional requests in the background. Renders only read from the cache and
+    fall back to a blocking download on a cold miss.
+    """
+    def __init__(self, cache_dir=PORTRAIT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._memory = {}
+
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.png"), os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load_meta(self, url):
+        _, meta_path = self._paths(url)
+        try:
+            with open(meta_path, "r") as meta_file:
+                return json.load(meta_file)
+        except (OSError, ValueError):
+            return {}
+
+    def _store(self, url, portrait, meta):
+        self._memory[url] = portrait
+        image_path, meta_path = self._paths(url)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            portrait.save(image_path + ".tmp", format="PNG")
+            os.replace(image_path + ".tmp", image_path)
+            self._touch(url, meta)
+        except OSError as e:
+            print(f"Could not write portrait cache for {url}: {e}")
+
+    def _touch(self, url, meta):
+        _, meta_path = self._paths(url)
+        meta["checked_at"] = time.time()
+        with open(meta_path + ".tmp", "w") as meta_file:
+            json.dump(meta, meta_file)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    def get(self, url):
+        if url in self._memory:
+            return self._memory[url]
+        image_path, _ = self._paths(url)
+        if os.path.exists(image_path):
+            with Image.open(image_path) as portrait:
+                portrait.load()
+                self._memory[url] = portrait.convert("RGBA")
+            return self._memory[url]
+
+        # Cold miss: download now so the render can still go ahead
+        response = requests.get(url, timeout=10)
+        response.raise_for_status()  # Raise an exception for HTTP errors
+        portrait = decode_portrait(response.content)
+        self._store(url, portrait, {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")})
+        return portrait
+
+    async def _revalidate(self, session, semaphore, url, force):
+        image_path, _ = self._paths(url)
+        meta = self._load_meta(url) if os.path.exists(image_path) else {}
+        if not force and meta and time.time() - meta.get("checked_at", 0) < PORTRAIT_REVALIDATE_SECONDS:
+            return False
+
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+        async with semaphore:
+            try:
+                async with session.get(url, headers=headers) as response:
+                    if response.status == 304:
+                        self._touch(url, meta)
+                        return False
+                    response.raise_for_status()
+                    content = await response.read()
+                    new_meta = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"Could not refresh portrait {url}: {e}")
+                return False
+
+        portrait = await asyncio.to_thread(decode_portrait, content)
+        await asyncio.to_thread(self._store, url, portrait, new_meta)
+        # A portrait we already had came back with new content
+        return bool(meta)
+
+    async def refresh(self, urls, force=False):
+        """Prefetch missing portraits and revalidate stale ones. Returns the URLs whose image changed."""
+        urls = list(dict.fromkeys(url for url in urls if url))
+        semaphore = asyncio.Semaphore(PORTRAIT_FETCH_CONCURRENCY)
+        timeout = aiohttp.ClientTimeout(total=30)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            results = await asyncio.gather(*(self._revalidate(session, semaphore, url, force) for url in urls), return_exceptions=True)
+        changed = set()
+        for url, result in zip(urls, results):
+            if isinstance(result, Exception):
+                print(f"Could not refresh portrait {url}: {result}")
+            elif result:
+                changed.add(url)
+        return changed
+
+portrait_cache = PortraitCache()
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+
+class ResetSchedule:
+    """A registered daily reset time, parsed once.
+
+    Holds the wall-clock hour and minute, the resolved tzinfo and whether the
+    time was registered during DST. When the zone's current DST state differs
+    from the registered one the reset moves by an hour, same as it always has.
+    """
+    __slots__ = ("hour", "minute", "tzinfo", "dst")
+
+    def __init__(self, hour, minute, tzinfo, dst):
+        self.hour = hour
+        self.minute = minute
+        self.tzinfo = tzinfo
+        self.dst = dst
+
+    def local_time(self, at):
+        # Shift by an hour when the zone's DST state at `at` differs from the one registered
+        minutes = self.hour * 60 + self.minute
+        is_dst = at.dst() != timedelta(0)
+        if self.dst and not is_dst:
+            minutes -= 60
+        elif not self.dst and is_dst:
+            minutes += 60
+        minutes %= 24 * 60
+        return minutes // 60, minutes % 60
+
+    def reset_on(self, day):
+        """The reset on a local calendar date.
+
+        The DST shift is taken from the reset moment itself, which is when the
+        per-minute check used to compare against it, so days where the clocks
+        change get that day's offset rather than the previous day's.
+        """
+        midnight = datetime(day.year, day.month, day.day, tzinfo=self.tzinfo)
+        for probe in (midnight.replace(hour=self.hour, minute=self.minute), midnight.replace(hour=12)):
+            hour, minute = self.local_time(probe)
+            reset = midnight.replace(hour=hour, minute=minute)
+            if self.local_time(reset) == (hour, minute):
+                return reset
+        return reset
+
+    def next_reset(self, now=None, today=False):
+        """Today's reset if today is True, otherwise the first reset after now."""
+        now = datetime.now(self.tzinfo) if now is None else now.astimezone(self.tzinfo)
+        reset = self.reset_on(now.date())
+        if not today and reset <= now:
+            reset = self.reset_on(now.date() + timedelta(days=1))
+        return reset
+
+    def next_resets(self, count, now=None):
+        """The next `count` resets, each day using that day's own DST state."""
+        first = self.next_reset(now)
+        return [first] + [self.reset_on(first.date() + timedelta(days=days)) for days in range(1, count)]
+
+def next_reset_epochs(schedules, now=None):
+    """Next reset epoch for every schedule in a {key: ResetSchedule} map, all against the same now."""
+    now = datetime.now().astimezone() if now is None else now
+    return {key: schedule.next_reset(now).timestamp() for key, schedule in schedules.items()}
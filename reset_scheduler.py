@@ -0,0 +1,83 @@
+import asyncio
+import heapq
+import itertools
+import time
+
+MAX_SLEEP_SECONDS = 300 # wake up at least this often so a suspended host or clock change can't strand a reset
+
+class ResetScheduler:
+    """Min-heap of upcoming reset times, one entry per guild or subscriber.
+
+    next_time(key) returns the next epoch a key should fire at (or None to drop
+    it) and fire(key, when) sends the message. run() sleeps until the earliest
+    deadline, fires everything that is due and asks next_time() again, so reset
+    times are only computed when something fires or a registration changes.
+    """
+    def __init__(self, next_time, fire):
+        self.next_time = next_time
+        self.fire = fire
+        self._heap = []
+        self._deadlines = {}
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def update(self, key):
+        """Recompute a key's next reset after its settings changed."""
+        try:
+            when = self.next_time(key)
+        except Exception as e:
+            print(f"Could not schedule reset for {key}: {e}")
+            when = None
+
+        if when is None:
+            self._deadlines.pop(key, None)
+            return
+        self.schedule(key, when)
+
+    def schedule(self, key, when):
+        self._deadlines[key] = when
+        # Older heap entries for this key are skipped when they surface
+        heapq.heappush(self._heap, (when, next(self._counter), key))
+        if self._heap[0][2] == key:
+            self._wakeup.set()
+
+    def cancel(self, key):
+        self._deadlines.pop(key, None)
+
+    def _pop_due(self, now):
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            when, _, key = heapq.heappop(self._heap)
+            if self._deadlines.get(key) == when:
+                del self._deadlines[key]
+                due.append((key, when))
+        return due
+
+    def _discard_stale(self):
+        while self._heap and self._deadlines.get(self._heap[0][2]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+    async def run(self):
+        while True:
+            self._discard_stale()
+            delay = MAX_SLEEP_SECONDS
+            if self._heap:
+                delay = min(max(self._heap[0][0] - time.time(), 0), MAX_SLEEP_SECONDS)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                continue
+            except asyncio.TimeoutError:
+                pass
+
+            for key, when in self._pop_due(time.time()):
+                try:
+                    await self.fire(key, when)
+                except Exception as e:
+                    print(f"Unexpected error firing reset for {key}: {e}")
+                # Only reschedule if nothing re-registered the key while it was firing
+                if key not in self._deadlines:
+                    self.update(key)
@@ -0,0 +1,69 @@
+import heapq
+import re
+
+class NameSearchIndex:
+    """Autocomplete index over a list of names.
+
+    A prefix trie over every word start answers prefix and word-boundary matches,
+    and a trigram index narrows plain substring (infix) matches. Results are
+    ranked: name prefix, then word-boundary prefix, then substring, then alphabetical.
+    """
+    RANK_PREFIX = 0
+    RANK_WORD = 1
+    RANK_SUBSTRING = 2
+
+    def __init__(self, names):
+        # Sorted, de-duplicated names so an id's order is also the alphabetical order
+        self.names = sorted(set(names))
+        self._lowered = [name.lower() for name in self.names]
+        self._trie = {}
+        self._trigrams = {}
+
+        for name_id, lowered in enumerate(self._lowered):
+            for match in re.finditer(r"\S+", lowered):
+                rank = self.RANK_PREFIX if match.start() == 0 else self.RANK_WORD
+                self._insert(lowered[match.start():], name_id, rank)
+            for i in range(len(lowered) - 2):
+                self._trigrams.setdefault(lowered[i:i + 3], set()).add(name_id)
+
+    def _insert(self, text, name_id, rank):
+        # Every node on the path keeps the best rank per name, so a lookup is O(len(query))
+        node = self._trie
+        for char in text:
+            node = node.setdefault(char, {})
+            matches = node.setdefault(None, {})
+            if rank < matches.get(name_id, self.RANK_SUBSTRING):
+                matches[name_id] = rank
+
+    def _prefix_matches(self, text):
+        node = self._trie
+        for char in text:
+            node = node.get(char)
+            if node is None:
+                return {}
+        return node.get(None, {})
+
+    def _substring_matches(self, text):
+        if len(text) < 3:
+            return {name_id for name_id, lowered in enumerate(self._lowered) if text in lowered}
+        candidates = None
+        for i in range(len(text) - 2):
+            posting = self._trigrams.get(text[i:i + 3])
+            if not posting:
+                return set()
+            candidates = set(posting) if candidates is None else candidates & posting
+        # Trigrams can match out of order, so confirm the real substring
+        return {name_id for name_id in candidates if text in self._lowered[name_id]}
+
+    def search(self, text: str, limit: int = 25):
+        text = (text or "").lower().strip()
+        if not text:
+            return self.names[:limit]
+
+        ranked = dict(self._prefix_matches(text))
+        if len(ranked) < limit:
+            for name_id in self._substring_matches(text):
+                ranked.setdefault(name_id, self.RANK_SUBSTRING)
+
+        best = heapq.nsmallest(limit, ranked.items(), key=lambda item: (item[1], item[0]))
+        return [self.names[name_id] for name_id, _ in best]
@@ -0,0 +1,80 @@
+import aiohttp
+import asyncio
+import os
+from collections import deque
+import discord
+
+MAX_EMBEDS_PER_MESSAGE = 10 # Discord's limit on embeds in one message
+MAX_EMBED_CHARS_PER_MESSAGE = 6000 # Discord's limit on the combined size of those embeds
+SEND_RETRIES = int(os.getenv("SEND_RETRIES", "4"))
+SEND_BACKOFF_SECONDS = float(os.getenv("SEND_BACKOFF_SECONDS", "1"))
+
+class ChannelSendQueue:
+    """Outbound embeds grouped per channel.
+
+    Each channel gets its own queue and drain task, so a slow or rate limited
+    channel never holds up the others. Queued embeds are packed up to ten per
+    message. py-cord already waits out 429s using Discord's bucket headers;
+    server errors and rate limits that still surface are retried here with
+    exponential backoff.
+    """
+    def __init__(self):
+        self._queues = {}
+        self._drainers = {}
+
+    def enqueue(self, channel, embeds):
+        queue = self._queues.setdefault(channel.id, deque())
+        queue.extend(embed for embed in embeds if embed is not None)
+        drainer = self._drainers.get(channel.id)
+        if queue and (drainer is None or drainer.done()):
+            self._drainers[channel.id] = asyncio.create_task(self._drain(channel))
+
+    def _next_batch(self, queue):
+        batch = [queue.popleft()]
+        size = len(batch[0])
+        while queue and len(batch) < MAX_EMBEDS_PER_MESSAGE and size + len(queue[0]) <= MAX_EMBED_CHARS_PER_MESSAGE:
+            size += len(queue[0])
+            batch.append(queue.popleft())
+        return batch
+
+    async def _send(self, channel, batch):
+        for attempt in range(SEND_RETRIES + 1):
+            try:
+                await channel.send(embeds=batch)
+                return
+            except (discord.Forbidden, discord.NotFound) as e:
+                # Retrying won't help if the channel is gone or we lost access to it
+                print(f"Dropping {len(batch)} message(s) for channel {channel.id}: {e}")
+                return
+            except discord.HTTPException as e:
+                if e.status != 429 and e.status < 500:
+                    print(f"Error sending discord message to channel {channel.id}: {e}")
+                    return
+                error = e
+            except (aiohttp.ClientError, OSError, asyncio.TimeoutError) as e:
+                # Dropped connections and timeouts are retried like server errors
+                error = e
+            if attempt == SEND_RETRIES:
+                print(f"Giving up sending {len(batch)} message(s) to channel {channel.id}: {error}")
+                return
+            await asyncio.sleep(SEND_BACKOFF_SECONDS * 2 ** attempt)
+
+    async def _drain(self, channel):
+        queue = self._queues[channel.id]
+        try:
+            while queue:
+                batch = self._next_batch(queue)
+                try:
+                    await self._send(channel, batch)
+                except Exception as e:
+                    # Never let one bad batch stop this channel's drainer
+                    print(f"Unexpected error sending {len(batch)} message(s) to channel {channel.id}: {e}")
+        finally:
+            if not queue:
+                self._queues.pop(channel.id, None)
+                self._drainers.pop(channel.id, None)
+
+    def pending(self):
+        return sum(len(queue) for queue in self._queues.values())
+
+send_queue = ChannelSendQueue()
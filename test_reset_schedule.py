@@ -0,0 +1,34 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from reset_schedule import ResetSchedule
+
+NEW_YORK = ZoneInfo("America/New_York")
+
+def test_next_reset_uses_offset_of_fall_back_day():
+    # Registered during DST; clocks fall back on 2026-11-01
+    schedule = ResetSchedule(10, 30, NEW_YORK, True)
+    assert schedule.next_reset(datetime(2026, 10, 31, 9, 0, tzinfo=NEW_YORK)) == datetime(2026, 10, 31, 10, 30, tzinfo=NEW_YORK)
+    assert schedule.next_reset(datetime(2026, 10, 31, 12, 0, tzinfo=NEW_YORK)) == datetime(2026, 11, 1, 9, 30, tzinfo=NEW_YORK)
+
+def test_next_reset_uses_offset_of_spring_forward_day():
+    # Registered outside DST; clocks spring forward on 2026-03-08
+    schedule = ResetSchedule(10, 30, NEW_YORK, False)
+    assert schedule.next_reset(datetime(2026, 3, 7, 12, 0, tzinfo=NEW_YORK)) == datetime(2026, 3, 8, 11, 30, tzinfo=NEW_YORK)
+    assert schedule.next_reset(datetime(2026, 3, 8, 11, 0, tzinfo=NEW_YORK)) == datetime(2026, 3, 8, 11, 30, tzinfo=NEW_YORK)
+
+def test_next_resets_across_fall_back():
+    schedule = ResetSchedule(10, 30, NEW_YORK, True)
+    resets = schedule.next_resets(3, datetime(2026, 10, 31, 9, 0, tzinfo=NEW_YORK))
+    assert resets == [
+        datetime(2026, 10, 31, 10, 30, tzinfo=NEW_YORK),
+        datetime(2026, 11, 1, 9, 30, tzinfo=NEW_YORK),
+        datetime(2026, 11, 2, 9, 30, tzinfo=NEW_YORK),
+    ]
+
+def test_next_resets_across_spring_forward():
+    schedule = ResetSchedule(10, 30, NEW_YORK, False)
+    resets = schedule.next_resets(2, datetime(2026, 3, 7, 9, 0, tzinfo=NEW_YORK))
+    assert resets == [
+        datetime(2026, 3, 7, 10, 30, tzinfo=NEW_YORK),
+        datetime(2026, 3, 8, 11, 30, tzinfo=NEW_YORK),
+    ]
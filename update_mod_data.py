@@ -4,6 +4,9 @@ from bs4 import BeautifulSoup
 import json
 import discord
 from functools import wraps
+from search_index import NameSearchIndex
+
+MOD_DATA_FILE = "swgoh_mod_recommendations.json"
 
 def print_and_ignore_exceptions(func):
     @wraps(func)
@@ -16,10 +19,68 @@ def print_and_ignore_exceptions(func):
             print(f"Unexpected error in {func.__name__}: {str(e)}")
     return wrapper
 
+class ModStore:
+    """In-memory mod recommendations with inverted indexes for /mods and /modsearch.
+
+    The file is parsed on first use and then only when check_and_update_mod_data
+    writes new data.
+    """
+    def __init__(self, data_file=MOD_DATA_FILE):
+        self.data_file = data_file
+        self.data = None
+        self.by_name = {}
+        self.by_slot_stat = {}  # (slot, primary stat) -> set of character positions
+        self.by_mod_set = {}    # mod set -> set of character positions
+        self.search_index = NameSearchIndex([])
+
+    def _index(self, data):
+        self.data = data
+        self.by_name = {}
+        self.by_slot_stat = {}
+        self.by_mod_set = {}
+        for position, character in enumerate(data):
+            self.by_name.setdefault(character['character_name'].lower(), character)
+            for mod_set in character['mod_sets']:
+                self.by_mod_set.setdefault(mod_set, set()).add(position)
+            for slot, stat in character['recommended_stats'].items():
+                # Recommendations look like "Critical Damage / Critical Chance"
+                for primary_stat in stat.split('/'):
+                    self.by_slot_stat.setdefault((slot, primary_stat.strip()), set()).add(position)
+        self.search_index = NameSearchIndex([character['character_name'] for character in data])
+
+    def get_data(self):
+        if self.data is None:
+            with open(self.data_file, "r") as json_file:
+                self._index(json.load(json_file))
+        return self.data
+
+    def replace(self, data):
+        self._index(data)
+
+    def get_character(self, character_name: str):
+        self.get_data()
+        return self.by_name.get(character_name.lower())
+
+    def find_characters(self, mod_type=None, primary_stat=None, mod_set=None):
+        mod_data = self.get_data()
+        slot = mod_type.lower() if mod_type is not None else None
+
+        # Union every indexed stat that contains the requested one, same as the old substring test
+        matches = set()
+        for (indexed_slot, indexed_stat), positions in self.by_slot_stat.items():
+            if (slot is None or indexed_slot == slot) and (primary_stat is None or primary_stat in indexed_stat):
+                matches |= positions
+        if mod_set is not None:
+            matches &= self.by_mod_set.get(mod_set, set())
+
+        # Keep the order of the recommendations file
+        return [mod_data[position]['character_name'] for position in sorted(matches)]
+
+mod_store = ModStore()
+
 # Load the JSON data from the file
 def load_mod_data():
-    with open("swgoh_mod_recommendations.json", "r") as json_file:
-        return json.load(json_file)
+    return mod_store.get_data()
 
 def check_and_update_mod_data():
     url = "https://swgoh.gg/stats/mod-meta-report/guilds_100_gp/"
@@ -56,8 +117,9 @@ def check_and_update_mod_data():
             }
         })
     
-    with open("swgoh_mod_recommendations.json", "w") as json_file:
+    with open(MOD_DATA_FILE, "w") as json_file:
         json.dump(mod_data, json_file, indent=4)
+    mod_store.replace(mod_data)
 
 # Load the JSON data from the file
 def load_character_names():
@@ -69,42 +131,19 @@ def load_character_names():
 @print_and_ignore_exceptions
 async def get_valid_mod_characters(ctx: discord.AutocompleteContext):
     text = ctx.value
-    character_names = load_character_names()
-    
-    # Filter character names based on user input
-    filtered_characters = [name for name in character_names if text.lower() in name.lower()]
-    
-    # Return the first 25 matches or all matches if fewer than 25
-    if len(filtered_characters) > 25:
-        return filtered_characters[:25]
-    else:
-        return filtered_characters
+    mod_store.get_data()
+
+    # Return the 25 best ranked character names for the user's input
+    return mod_store.search_index.search(text, 25)
 
 
 
 # Function to get the mod information for a specific character
 def get_character_mod_info(character_name: str):
-    mod_data = load_mod_data()
-
-    # Find the character's mod information in the JSON data
-    for character in mod_data:
-        if character['character_name'].lower() == character_name.lower():
-            return character
-    
-    return None  # Return None if the character is not found
+    # Returns None if the character is not found
+    return mod_store.get_character(character_name)
 
 # Function to find characters matching the search criteria
 def find_characters_with_mod(mod_type=None, primary_stat=None, mod_set=None):
-    mod_data = load_mod_data()
-    
-    characters = []
-    for character in mod_data:
-        # Check if mod_set matches or if mod_set is None (no filtering by mod_set)
-        if mod_set is None or mod_set in character["mod_sets"]:
-            for mod, stat in character["recommended_stats"].items():
-                # Check if mod_type matches or if mod_type is None (no filtering by mod_type)
-                if (mod_type is None or mod == mod_type.lower()) and \
-                   (primary_stat is None or primary_stat in stat):
-                    characters.append(character["character_name"])
-                    break
-    return characters
+    # Set intersection over the (slot, primary stat) and mod set indexes
+    return mod_store.find_characters(mod_type, primary_stat, mod_set)
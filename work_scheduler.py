@@ -0,0 +1,75 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+INTERACTIVE_BUDGET = int(os.getenv("INTERACTIVE_BUDGET", "10")) # interactive Comlink calls in flight at once
+BACKGROUND_BUDGET = int(os.getenv("BACKGROUND_BUDGET", "10")) # background Comlink calls in flight at once
+BACKGROUND_BUDGET_WHILE_INTERACTIVE = int(os.getenv("BACKGROUND_BUDGET_WHILE_INTERACTIVE", "2")) # ...while interactive calls are running
+
+# Work runs as background unless the task handling a user's command says otherwise
+current_priority = ContextVar("current_priority", default=BACKGROUND)
+
+class WorkScheduler:
+    """Admits work by priority class, each class with its own concurrency budget.
+
+    Interactive work (slash commands, uploads) always goes first: background work
+    waits while any interactive work is queued, and runs with a smaller budget
+    while interactive work is in flight.
+    """
+    def __init__(self, budgets, throttled_budgets):
+        self.budgets = budgets
+        self.throttled_budgets = throttled_budgets
+        self.running = {priority: 0 for priority in budgets}
+        self.waiting = {priority: 0 for priority in budgets}
+        self.completed = {priority: 0 for priority in budgets}
+        self._condition = asyncio.Condition()
+
+    def _can_run(self, priority):
+        higher = [other for other in self.budgets if other < priority]
+        if any(self.waiting[other] for other in higher):
+            return False
+        budget = self.budgets[priority]
+        if any(self.running[other] for other in higher):
+            budget = self.throttled_budgets.get(priority, budget)
+        return self.running[priority] < budget
+
+    @asynccontextmanager
+    async def slot(self, priority=None):
+        priority = current_priority.get() if priority is None else priority
+        async with self._condition:
+            self.waiting[priority] += 1
+            try:
+                await self._condition.wait_for(lambda: self._can_run(priority))
+            finally:
+                self.waiting[priority] -= 1
+                # Lower classes may have been waiting on this one
+                self._condition.notify_all()
+            self.running[priority] += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self.running[priority] -= 1
+                self.completed[priority] += 1
+                self._condition.notify_all()
+
+    def metrics(self):
+        return {
+            PRIORITY_NAMES[priority]: {
+                "running": self.running[priority],
+                "waiting": self.waiting[priority],
+                "completed": self.completed[priority],
+                "budget": self.budgets[priority]
+            }
+            for priority in self.budgets
+        }
+
+work_scheduler = WorkScheduler(
+    {INTERACTIVE: INTERACTIVE_BUDGET, BACKGROUND: BACKGROUND_BUDGET},
+    {BACKGROUND: BACKGROUND_BUDGET_WHILE_INTERACTIVE}
+)
@@ -0,0 +1,34 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+class WorkerPoolFull(Exception):
+    pass
+
+class BoundedWorkerPool:
+    """Runs blocking work in a thread pool without ever blocking the event loop.
+
+    At most max_workers jobs run at once and at most max_pending jobs may be
+    queued or running. Once the pool is full, run() raises WorkerPoolFull right
+    away so callers can tell the user to retry instead of piling up work.
+    """
+    def __init__(self, name, max_workers, max_pending):
+        self.name = name
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+
+    async def run(self, func, *args):
+        if self.pending >= self.max_pending:
+            raise WorkerPoolFull(f"{self.name} queue is full ({self.pending}/{self.max_pending})")
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+# Pillow releases the GIL for most of its heavy lifting, so threads are enough for rendering
+render_pool = BoundedWorkerPool("render", int(os.getenv("RENDER_WORKERS", "2")), int(os.getenv("RENDER_QUEUE_DEPTH", "8")))